@@ -1,11 +1,23 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px  # SUGESTÃO: Importar Plotly para gráficos interativos
+import numpy as np
 import os
-import re
+import time
+
+from cube import (build_cube_lattice, build_rank_cube, slice_cube, query_cells, cells_from_rows, cube_metrics,
+                  cube_genre_counts, cube_genre_ratings, cube_by_year, cube_correlation, cube_spearman, cube_genre_correlations, rating_distribution,
+                  cube_genre_cooccurrence, cooccurrence_matrix)
+from dataset_store import load_dataset, load_columnar, current_version, compact_frame, memory_report
+from query_cache import QueryCache, make_filter_key
+from filtering import build_query_index, filter_positions, select_rows
+from countries import country_mask_columns, country_stats, get_unique_countries, index_countries
+from genres import GENRE_MASK_COLUMN, genre_mask_columns, index_genres, get_unique_genres
+from instrumentation import measure
+from export import EXPORT_FORMATS, available_formats, export_bytes
+from pagination import (SORTABLE_COLUMNS, PAGE_SIZES, sort_order, order_selection, build_title_index,
+                        search_titles, page_bounds)
+from similarity import build_similarity_index, similar_titles
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -16,102 +28,96 @@ st.set_page_config(
 
 # --- FUNÇÕES DE PROCESSAMENTO DE DADOS ---
 
-@st.cache_data # Cache para carregar os dados apenas uma vez
-def load_data():
-    """Carrega os dados já pré-processados."""
+DATA_PATH = 'data/processed/data_tratada.csv'
+
+def dataset_version():
+    """Versão atual do artefato colunar (lida a cada execução do script); 'csv' sem artefato."""
+    return current_version(DATA_PATH) or 'csv'
+
+@st.cache_resource(max_entries=2) # Um catálogo por versão, compartilhado sem cópias entre as sessões
+def load_data(version):
+    """
+    Carrega os dados já pré-processados.
+
+    Com o artefato colunar, as colunas são mapeadas em memória somente leitura:
+    todos os processos do app no mesmo servidor compartilham as mesmas páginas.
+    Quando uma versão nova é publicada, a próxima execução do script a carrega
+    e a anterior sai do cache.
+    """
     try:
-        df = pd.read_csv('data/processed/data_tratada.csv', encoding='utf-8-sig')
+        df = load_columnar(DATA_PATH, categorical=True, version=version) if version != 'csv' else None
+        if df is None:
+            # Sem artefato (ou obsoleto): o CSV fica como fallback
+            df, _ = load_dataset(DATA_PATH)
         # Não precisa mais de aplicar a limpeza aqui!
-        return df
+        # Índice de bits dos gêneros: filtros exatos sem varrer as strings
+        if GENRE_MASK_COLUMN not in df.columns:
+            df = index_genres(df)
+        # Índice de bits dos países (availableCountries), idem
+        if not country_mask_columns(df):
+            df = index_countries(df)
+        # Layout compacto: categorias e tipos menores, cópia menor por processo
+        compact = compact_frame(df)
+        # Exibido na barra lateral; o loader em cache não escreve no log do servidor
+        total = memory_report(df, compact).loc['TOTAL']
+        compact.attrs['memory_mb'] = (total['antes'] / 1024 ** 2, total['depois'] / 1024 ** 2)
+        return compact
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return None
 
-    except Exception as e:
-        st.error(f"Ocorreu um erro ao carregar ou processar os dados: {str(e)}")
-        return None
-
-def clean_and_standardize_genres(genres_str):
-    """
-    Padroniza os gêneros, consolida subgêneros e remove inconsistências,
-    lidando com múltiplos separadores e combinações específicas.
-    """
-    if pd.isna(genres_str) or not isinstance(genres_str, str):
-        return ''
-
-    # Dicionário de mapeamento para padronizar nomes de gêneros
-    genre_mapping = {
-        'action adventure': 'action',
-        'action-adventure': 'action',
-        'sci-fi fantasy': 'science fiction',
-        'war politics': 'war',
-        'film-noir': 'noir',
-        'tv movie': 'movie',
-        'sci-fi': 'science fiction',
-        'science-fiction': 'science fiction',
-        'sci fi': 'science fiction',
-        'reality-tv': 'reality',
-        'talk-show': 'talk show',
-        'game-show': 'game show',
-        'musical': 'music'
-    }
-
-    # 1. Limpa caracteres de lista e converte para minúsculas
-    processed_str = str(genres_str).lower().replace('[','').replace(']','').replace("'",'').replace('"','')
-    
-    # 2. Aplica mapeamentos de frases completas primeiro
-    for key, value in genre_mapping.items():
-        processed_str = processed_str.replace(key, value)
-
-    # 3. Divide a string em uma lista de gêneros usando múltiplos separadores
-    genres_list = re.split(r'[,/&;]', processed_str)
-    
-    # 4. Limpa espaços em branco e remove strings vazias, criando um conjunto para valores únicos
-    mapped_genres = {g.strip() for g in genres_list if g.strip()}
-
-    # 5. Lógica de consolidação para combinações específicas
-    # Se um filme é 'Action' e 'Adventure', consideramos apenas 'Action'.
-    if 'action' in mapped_genres and 'adventure' in mapped_genres:
-        mapped_genres.remove('adventure')
-    
-    # Se um filme é 'Science Fiction' e 'Fantasy', consideramos apenas 'Science Fiction'.
-    if 'science fiction' in mapped_genres and 'fantasy' in mapped_genres:
-        mapped_genres.remove('fantasy')
-
-    # 6. Retorna a string final, ordenada e com letras maiúsculas
-    if not mapped_genres:
-        return ''
-    return ','.join(sorted([g.title() for g in mapped_genres]))
-
-    # Primeiro, aplicamos o mapeamento para frases completas
-    genres_str_lower = str(genres_str).lower()
-    for key, value in genre_mapping.items():
-        if key in genres_str_lower:
-            genres_str_lower = genres_str_lower.replace(key, value)
-
-    # Agora, separamos e limpamos os gêneros individuais
-    genres = [g.strip() for g in genres_str_lower.split(',')]
-    
-    # Usamos um set para garantir que os gêneros sejam únicos após a limpeza
-    cleaned_genres = set()
-
-    for genre in genres:
-        # Remove caracteres especiais e espaços extras
-        cleaned = re.sub(r'[^\w\s-]', '', genre).strip()
-        if cleaned:
-            cleaned_genres.add(cleaned)
-
-    # Retorna os gêneros em ordem alfabética e com a primeira letra maiúscula
-    return ','.join(sorted([g.title() for g in cleaned_genres]))
-
-
-def get_unique_genres(df):
-    """Extrai uma lista de todos os gêneros únicos do DataFrame."""
-    all_genres = set()
-    # O método explode é mais eficiente para "desaninhar" listas
-    df_exploded = df['genres'].str.split(',').explode()
-    all_genres.update([g.strip() for g in df_exploded.dropna() if g.strip()])
-    return sorted(list(all_genres))
+@st.cache_resource(max_entries=2) # O cubo é montado uma vez por versão dos dados
+def load_cube(version):
+    """Cubo pré-agregado e suas agregações: métricas e gráficos somam células em vez de varrer linhas."""
+    return build_cube_lattice(load_data(version))
+
+@st.cache_resource(max_entries=2)
+def load_rank_cube(version):
+    """Cubo de contagens com nota exata e faixas de votos (Spearman e distribuição das notas)."""
+    return build_rank_cube(load_data(version))
+
+@st.cache_resource(max_entries=2) # Índices somente leitura, compartilhados entre as sessões
+def load_query_index(version):
+    """Permutações ordenadas de ano, nota e tipo para os filtros por intervalo."""
+    return build_query_index(load_data(version))
+
+@st.cache_resource(max_entries=2) # Um cache de consultas por processo e versão, compartilhado entre as sessões
+def get_query_cache(version):
+    """Cache LRU (limite de entradas e de memória) dos resultados por chave de filtros."""
+    return QueryCache(max_entries=64, max_bytes=256 * 1024 ** 2)
+
+@st.cache_resource(max_entries=2) # Índice de busca por título, um por versão dos dados
+def load_title_index(version):
+    """Índice invertido das palavras dos títulos (busca da tabela de dados filtrados)."""
+    return build_title_index(load_data(version)['title'])
+
+@st.cache_resource(max_entries=2) # Índice de similaridade, um por versão dos dados
+def load_similarity_index(version):
+    """Máscaras de gêneros e atributos normalizados para a busca de títulos parecidos."""
+    return build_similarity_index(load_data(version))
+
+@st.cache_resource(max_entries=4 * len(SORTABLE_COLUMNS)) # Ordens do catálogo inteiro por coluna e sentido
+def load_sort_order(version, column, descending):
+    """Permutação estável do catálogo por uma coluna numérica."""
+    return sort_order(load_data(version)[column], descending)
+
+def cached_query(filter_key, name, compute):
+    """Resultado memoizado de uma consulta (filtro ou agregado de aba) para a chave de filtros."""
+    return get_query_cache(version).get_or_compute((filter_key, name), compute)
+
+def key_filters(filter_key):
+    """Dicionário de filtros (formato de filtering) a partir da chave normalizada."""
+    title_type, years, rating_range, genres, genre_mode, countries, country_mode = filter_key
+    return {'years': years, 'rating_range': rating_range, 'type': title_type,
+            'genres': list(genres), 'genre_mode': genre_mode,
+            'countries': list(countries), 'country_mode': country_mode}
+
+def filter_catalog(df, filter_key):
+    """Aplica os filtros da barra lateral (já normalizados em filter_key) ao catálogo."""
+    filters = key_filters(filter_key)
+    # Planejador sobre índices ordenados; só a seleção final é copiada
+    positions, _ = filter_positions(df, filters, load_query_index(version))
+    return select_rows(df, positions)
 
 # --- FUNÇÕES DE RENDERIZAÇÃO DAS ABAS (SUGESTÃO: Refatoração) ---
 # Mover a lógica de cada aba para sua própria função deixa o código principal mais limpo.
@@ -147,9 +153,10 @@ Por fim, integrei as análises em um dashboard interativo usando o Streamlit. El
 ---
 
 #### 🧭 Como Navegar
-- **Popularidade:** Gêneros com mais lançamentos.
+- **Popularidade:** Gêneros com mais lançamentos e os pares de gêneros que aparecem juntos.
 - **Distribuição:** Notas do IMDb por tipo/gênero.
 - **Evolução Temporal:** Lançamentos por ano e gênero.
+- **Países:** Títulos disponíveis, nota média e média de votos por país.
 - **Dados Filtrados:** Tabela com os dados filtrados conforme os critérios selecionados na barra lateral.
 
 ---
@@ -162,17 +169,19 @@ Por fim, integrei as análises em um dashboard interativo usando o Streamlit. El
 ---
 """)
 
-def render_popularity_tab(df):
-    """Renderiza a aba de Popularidade com gráficos interativos."""
+COOCCURRENCE_TOP_GENRES = 15
+
+def render_popularity_tab(cells, filter_key):
+    """Renderiza a aba de Popularidade com gráficos interativos (a partir das células do cubo)."""
+    import plotly.express as px  # Plotly só é importado quando uma aba com gráfico é aberta
+
     st.subheader("Top Gêneros por Popularidade")
     
-    if df.empty:
+    if cells['cube'].empty:
         st.warning("Nenhum dado disponível para os filtros selecionados.")
         return
 
-    genre_counts = df['genres'].str.split(',').explode().str.strip().value_counts().reset_index()
-    genre_counts.columns = ['Gênero', 'Contagem']
-    genre_counts = genre_counts.sort_values('Contagem', ascending=False).head(10)
+    genre_counts = cached_query(filter_key, 'genre_counts', lambda: cube_genre_counts(cells['genres'], top=10))
     
     # Começo do Plotly
     fig = px.bar(
@@ -191,46 +200,90 @@ def render_popularity_tab(df):
     st.markdown("### 📋 Tabela: Gêneros Mais Frequentes")
     st.dataframe(genre_counts, use_container_width=True)
 
-def render_distribution_tab(df):
-    """Renderiza a aba de Distribuição de Avaliações."""
+    # Pares de gêneros calculados uma vez por filtro; trocar a métrica só remonta a matriz
+    st.markdown("### 🧬 Co-ocorrência de Gêneros")
+    pairs = cached_query(filter_key, 'cooccurrence', lambda: cube_genre_cooccurrence(cells['cube']))
+    if pairs.empty:
+        st.info("Nenhum par de gêneros nos títulos filtrados.")
+        return
+    metric = st.radio("Métrica do par:", options=['Títulos', 'Nota Média', 'Lift'], horizontal=True)
+    top_genres = cube_genre_counts(cells['genres'], top=COOCCURRENCE_TOP_GENRES)['Gênero'].tolist()
+    matrix = cooccurrence_matrix(pairs, metric, top_genres)
+    fig_pairs = px.imshow(
+        matrix,
+        text_auto='.2f' if metric != 'Títulos' else True,
+        color_continuous_scale='RdBu_r' if metric == 'Lift' else 'Viridis',
+        color_continuous_midpoint=1.0 if metric == 'Lift' else None,
+        title=f"{metric} por Par de Gêneros (Top {len(top_genres)} gêneros)",
+        aspect='auto'
+    )
+    st.plotly_chart(fig_pairs, use_container_width=True)
+    st.caption("Lift > 1: o par aparece junto mais do que o esperado se os gêneros fossem independentes.")
+
+def render_distribution_tab(cells, rank_cells, filter_key):
+    """Renderiza a aba de Distribuição de Avaliações (a partir das células dos cubos)."""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     st.subheader("Distribuição de Avaliações por Gênero")
     
-    if df.empty:
+    if cells['cube'].empty:
         st.warning("Nenhum dado disponível para os filtros selecionados.")
         return
         
-    current_genres = get_unique_genres(df)
+    # Matriz gênero × nota exata (cubo de postos) calculada uma vez por filtro;
+    # trocar de gênero é só uma consulta nela
+    genre_ratings = cached_query(filter_key, 'genre_ratings', lambda: cube_genre_ratings(rank_cells()))
+    current_genres = cached_query(filter_key, 'genres', lambda: sorted(
+        cube_genre_counts(cells['genres'])['Gênero'].tolist()))
     if not current_genres:
         st.info("Nenhum gênero para analisar com os filtros atuais.")
         return
         
     genre_to_analyze = st.selectbox("Selecione um gênero para detalhar:", options=current_genres)
     
-    # SUGESTÃO: Usar Plotly também para o histograma
-    genre_df = df[df['genres'].str.contains(re.escape(genre_to_analyze), na=False)]
-    fig = px.histogram(
-        genre_df,
-        x='imdbAverageRating',
-        nbins=30,
-        title=f"Distribuição de Avaliações - {genre_to_analyze}",
-        labels={'imdbAverageRating': 'Avaliação IMDb'},
-        marginal="box" # Adiciona um boxplot para ver a distribuição
-    )
+    stats = cached_query(filter_key, ('rating_distribution', genre_to_analyze),
+                         lambda: rating_distribution(genre_ratings, genre_to_analyze, bins=30))
+    if stats is None:
+        st.info(f"Nenhum título avaliado em {genre_to_analyze} com os filtros atuais.")
+        return
+
+    # O gráfico recebe só as contagens dos bins e o resumo de cinco números
+    edges = stats['edges']
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    fig.add_trace(go.Box(
+        y=[genre_to_analyze], q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+        lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']], mean=[stats['mean']],
+        orientation='h', name=genre_to_analyze, showlegend=False, marker_color='#636efa',
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=stats['counts'], width=np.diff(edges),
+        name=genre_to_analyze, showlegend=False, marker_color='#636efa',
+    ), row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text='Avaliação IMDb', row=2, col=1)
+    fig.update_yaxes(title_text='count', row=2, col=1)
+    fig.update_layout(title=f"Distribuição de Avaliações - {genre_to_analyze}", bargap=0)
     st.plotly_chart(fig, use_container_width=True)
     
-    # ... (resto da sua lógica da aba de distribuição)
+    st.caption(f"{stats['n']:,} títulos avaliados | mínimo {stats['min']:.1f} | Q1 {stats['q1']:.2f} | "
+               f"mediana {stats['median']:.2f} | Q3 {stats['q3']:.2f} | máximo {stats['max']:.1f}")
+
+def render_temporal_evolution_tab(cells, filter_key):
+    """Renderiza a aba de Evolução Temporal (a partir das células do cubo)."""
+    import plotly.express as px
 
-def render_temporal_evolution_tab(df):
-    """Renderiza a aba de Evolução Temporal."""
     st.subheader("Evolução Temporal das Análises")
 
-    if df.empty:
+    if cells['cube'].empty:
         st.warning("Nenhum dado disponível para os filtros selecionados.")
         return
 
+    by_year = cached_query(filter_key, 'by_year', lambda: cube_by_year(cells['titles']))
+
     # Gráfico de linha - Média de avaliações por ano
     st.markdown("#### Média de Avaliações por Ano")
-    avg_rating_by_year = df.groupby('releaseYear')['imdbAverageRating'].mean().reset_index()
+    avg_rating_by_year = by_year[['releaseYear', 'imdbAverageRating']]
     fig1 = px.line(
         avg_rating_by_year,
         x='releaseYear',
@@ -243,8 +296,7 @@ def render_temporal_evolution_tab(df):
 
     # Gráfico de barras - Quantidade de lançamentos por ano
     st.markdown("#### Quantidade de Lançamentos por Ano")
-    year_counts = df['releaseYear'].value_counts().sort_index().reset_index()
-    year_counts.columns = ['releaseYear', 'count']
+    year_counts = by_year[['releaseYear', 'count']]
     
     # SUGESTÃO: Usar um gráfico de área para esta visualização, fica ótimo!
     fig2 = px.area(
@@ -256,8 +308,15 @@ def render_temporal_evolution_tab(df):
     )
     st.plotly_chart(fig2, use_container_width=True)
 
-def render_correlation_tab(df):
-    """SUGESTÃO: Nova aba para análise de correlação."""
+CORR_LABELS = {'releaseYear': 'Ano', 'imdbAverageRating': 'Nota IMDb', 'imdbNumVotes': 'Votos',
+               'log_votes': 'log(Votos)'}
+GENRE_CORR_PAIRS = [('imdbAverageRating', 'log_votes'), ('releaseYear', 'imdbAverageRating'),
+                    ('releaseYear', 'log_votes')]
+
+def render_correlation_tab(cells, rank_cells, filter_key):
+    """Aba de correlação: matrizes montadas das estatísticas das células do cubo."""
+    import plotly.express as px
+
     st.subheader("Análise de Correlação entre Métricas")
     st.markdown("""
     Esta análise nos ajuda a entender como as variáveis numéricas se relacionam. 
@@ -265,45 +324,141 @@ def render_correlation_tab(df):
     sugere que títulos com mais votos tendem a ter notas maiores.
     """)
 
-    if df.empty:
+    if cells['cube'].empty:
         st.warning("Nenhum dado disponível para os filtros selecionados.")
         return
 
-    # Selecionar apenas colunas numéricas para a correlação
-    corr_df = df[['releaseYear', 'imdbAverageRating', 'imdbNumVotes']].copy()
-    corr_matrix = corr_df.corr()
-
-    # Criar o heatmap com Matplotlib e Seaborn
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(
-        corr_matrix,
-        annot=True,       # Mostra os valores de correlação
-        cmap='coolwarm',  # Paleta de cores
-        fmt=".2f",        # Formata os números para 2 casas decimais
-        linewidths=.5,
-        ax=ax
+    methods = {'Pearson': 'pearson', 'Spearman (postos)': 'spearman'}
+    method = methods[st.radio("Método:", options=list(methods), horizontal=True)]
+    if method == 'pearson':
+        corr_matrix = cached_query(filter_key, 'corr', lambda: cube_correlation(cells['titles']))
+    else:
+        # Votos entram pela faixa (quantis do catálogo) do cubo de postos
+        corr_matrix = cached_query(filter_key, 'corr_spearman', lambda: cube_spearman(rank_cells()))
+    corr_matrix = corr_matrix.rename(index=CORR_LABELS, columns=CORR_LABELS)
+
+    fig = px.imshow(corr_matrix, text_auto='.2f', color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+                    title="Matriz de Correlação")
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Correlações por gênero"):
+        genre_corr = cached_query(filter_key, 'genre_corr', lambda: cube_genre_correlations(cells['genres'], GENRE_CORR_PAIRS))
+        # Resultado do cache é compartilhado: os rótulos vão em uma cópia
+        genre_corr = genre_corr.set_axis(
+            ['Títulos'] + [f"{CORR_LABELS[a]} × {CORR_LABELS[b]}" for a, b in GENRE_CORR_PAIRS], axis=1)
+        st.dataframe(genre_corr.style.format(precision=2), use_container_width=True)
+
+def ordered_rows(catalog, df, sort_column, descending, query):
+    """Posições no catálogo das linhas do recorte que casam com a busca, já ordenadas."""
+    positions = df.index.to_numpy()
+    matches = search_titles(load_title_index(version), query)
+    if matches is not None:
+        positions = np.intersect1d(positions, matches, assume_unique=True)
+    return order_selection(catalog[sort_column].to_numpy(), positions,
+                           load_sort_order(version, sort_column, descending), descending)
+
+def render_countries_tab(df, filter_key):
+    """Aba de disponibilidade por país (índice de bits de availableCountries)."""
+    import plotly.express as px
+
+    st.subheader("🌍 Disponibilidade por País")
+
+    stats = cached_query(filter_key, 'country_stats', lambda: country_stats(df))
+    if stats.empty:
+        st.info("Nenhum título com países disponíveis para os filtros selecionados.")
+        return
+
+    fig = px.bar(
+        stats.head(20),
+        x='País',
+        y='Títulos',
+        color='Nota Média',
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title="Países com Mais Títulos Disponíveis",
+        labels={'Títulos': 'Número de Títulos'}
     )
-    ax.set_title("Matriz de Correlação")
-    st.pyplot(fig)
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(stats.style.format({'Nota Média': '{:.2f}', 'Média de Votos': '{:,.0f}'}),
+                 use_container_width=True, hide_index=True)
 
-def render_filtered_data_tab(df):
-    """Renderiza a aba com a tabela de dados filtrados."""
+def render_filtered_data_tab(catalog, df, filter_key):
+    """Renderiza a aba com a tabela de dados filtrados (paginada no servidor)."""
     st.subheader("📋 Dados Filtrados")
+    col_search, col_sort, col_order, col_size = st.columns([3, 2, 1, 1])
+    with col_search:
+        query = st.text_input("Buscar título:", placeholder="ex.: dark knight").strip()
+    with col_sort:
+        sort_column = st.selectbox("Ordenar por:", options=SORTABLE_COLUMNS)
+    with col_order:
+        descending = st.radio("Ordem:", options=['Decrescente', 'Crescente']) == 'Decrescente'
+    with col_size:
+        page_size = st.selectbox("Linhas por página:", options=PAGE_SIZES, index=1)
+
+    # A ordem do recorte é calculada uma vez por chave; cada página só copia as suas linhas
+    ordered = cached_query(filter_key, ('ordered', sort_column, descending, query),
+                           lambda: ordered_rows(catalog, df, sort_column, descending, query))
+    _, _, pages = page_bounds(len(ordered), 1, page_size)
+    page = st.number_input("Página:", min_value=1, max_value=pages, value=1, step=1)
+    start, end, pages = page_bounds(len(ordered), page, page_size)
+    st.caption(f"Mostrando {start + 1 if end else 0:,}–{end:,} de {len(ordered):,} títulos (página {page} de {pages})")
+
+    # As máscaras de gêneros e países são detalhes internos dos índices, não vão para a tabela
+    index_columns = [*genre_mask_columns(catalog), *country_mask_columns(catalog)]
     st.dataframe(
-        df.sort_values('imdbAverageRating', ascending=False),
+        catalog.take(ordered[start:end]).drop(columns=index_columns, errors='ignore'),
         height=400,
-        use_container_width=True
+        use_container_width=True,
+        hide_index=True
     )
     
-    # Converter para CSV para o botão de download
-    csv = df.to_csv(index=False).encode('utf-8')
+    # Exportação gerada só no clique (em outra thread) e guardada por chave de filtros
+    export_df = df.drop(columns=index_columns, errors='ignore')
+    fmt = st.radio("Formato para download:", options=available_formats(),
+                   format_func=lambda f: EXPORT_FORMATS[f]['label'], horizontal=True)
     st.download_button(
-        label="📥 Baixar Dados Filtrados (CSV)",
-        data=csv,
-        file_name='dados_filtrados.csv',
-        mime='text/csv'
+        label=f"📥 Baixar Dados Filtrados ({EXPORT_FORMATS[fmt]['label']})",
+        data=lambda: cached_query(filter_key, ('export', fmt), lambda: export_bytes(export_df, fmt)),
+        file_name=f"dados_filtrados.{fmt}",
+        mime=EXPORT_FORMATS[fmt]['mime']
+    )
+
+    render_similar_titles(catalog, df, ordered[start:end], filter_key, index_columns)
+
+def render_similar_titles(catalog, df, page_positions, filter_key, index_columns):
+    """Títulos parecidos com um título da página (gêneros, ano, nota e votos)."""
+    st.markdown("#### 🔎 Títulos parecidos")
+    if not len(page_positions):
+        return
+    col_title, col_k, col_scope = st.columns([3, 1, 2])
+    with col_title:
+        position = st.selectbox("Parecidos com:", options=page_positions.tolist(),
+                                format_func=lambda p: f"{catalog['title'].iloc[p]} ({catalog['releaseYear'].iloc[p]:.0f})")
+    with col_k:
+        k = st.selectbox("Quantidade:", options=[5, 10, 20], index=1)
+    with col_scope:
+        only_filtered = st.checkbox("Só entre os títulos filtrados", value=False)
+
+    # Uma passada vetorizada sobre o catálogo (ou sobre o recorte) por título consultado
+    candidates = df.index.to_numpy() if only_filtered else None
+    neighbors, scores = cached_query(filter_key if only_filtered else None, ('similar', position, k, only_filtered),
+                                     lambda: similar_titles(load_similarity_index(version), position, k, candidates))
+    st.dataframe(
+        catalog.take(neighbors[0]).drop(columns=index_columns, errors='ignore')
+               .assign(Semelhança=np.round(scores[0], 3)),
+        use_container_width=True,
+        hide_index=True
     )
 
+def render_timed(name, render):
+    """Renderiza uma aba e guarda quanto ela custou nesta execução."""
+    start = time.perf_counter()
+    with measure(f"tab:{name}"):
+        render()
+    elapsed = time.perf_counter() - start
+    st.session_state.setdefault('tab_timings', {})[name] = elapsed
+    st.caption(f"⏱️ Aba renderizada em {elapsed * 1000:.0f} ms")
+    return elapsed
+
 def render_about_tab():
     """Renderiza a aba Sobre Mim."""
     st.markdown("#### 👩‍💻 Sobre o Projeto e Sobre Mim")
@@ -321,7 +476,9 @@ def render_about_tab():
 
 st.title("📊 Análise de Gêneros de Filmes/Séries")
 
-df = load_data()
+# Lida uma vez por execução: todas as consultas desta execução usam a mesma versão
+version = dataset_version()
+df = load_data(version)
 
 if df is not None:
     # --- BARRA LATERAL DE FILTROS ---
@@ -334,67 +491,92 @@ if df is not None:
         min_year, max_year = int(df['releaseYear'].min()), int(df['releaseYear'].max())
         selected_years = st.slider("Selecione o intervalo de anos:", min_year, max_year, (min_year, max_year))
         
-        unique_genres = get_unique_genres(df)
+        unique_genres = cached_query(None, 'genres', lambda: get_unique_genres(df))
         selected_genres = st.multiselect("Selecione gêneros:", options=unique_genres, default=['Action', 'Comedy', 'Drama'])
+        genre_modes = {'Qualquer um (OU)': 'any', 'Todos (E)': 'all', 'Nenhum (exclui)': 'none'}
+        genre_mode = genre_modes[st.radio("Combinação de gêneros:", options=list(genre_modes), horizontal=True)]
         
         min_rating, max_rating = float(df['imdbAverageRating'].min()), float(df['imdbAverageRating'].max())
         rating_range = st.slider("Filtrar por avaliação IMDb:", min_rating, max_rating, (6.0, 9.0), step=0.1)
 
+        unique_countries = cached_query(None, 'countries', lambda: get_unique_countries(df))
+        selected_countries = st.multiselect("Disponível em (países):", options=unique_countries, default=[])
+
+        st.divider()
+        # Só a aba visível é calculada; as outras são calculadas ao abrir (e ficam no cache de consultas)
+        lazy_tabs = st.toggle("Calcular só a aba ativa", value=True)
+        if 'memory_mb' in df.attrs:
+            before_mb, after_mb = df.attrs['memory_mb']
+            st.caption(f"🧠 Memória do catálogo ({version}): {before_mb:.1f} MB → {after_mb:.1f} MB")
+        timing_slot = st.empty()
+
     # --- LÓGICA DE FILTRAGEM ---
-    # Começa com uma cópia do dataframe original
-    filtered_df = df.copy()
-    
-    # Aplica os filtros sequencialmente
-    filtered_df = filtered_df[
-        (filtered_df['releaseYear'].between(*selected_years)) &
-        (filtered_df['imdbAverageRating'].between(*rating_range))
-    ]
-    
-    if selected_type != 'Todos':
-        filtered_df = filtered_df[filtered_df['type'] == selected_type]
-    
-    if selected_genres:
-        # Lógica de filtro "OU" para gêneros: um título precisa ter pelo menos um dos gêneros selecionados
-        genre_pattern = '|'.join([re.escape(g) for g in selected_genres])
-        filtered_df = filtered_df[filtered_df['genres'].str.contains(genre_pattern, na=False, regex=True)]
+    # Filtros equivalentes compartilham a mesma chave e, portanto, o mesmo cache
+    filter_key = make_filter_key(selected_type, selected_years, rating_range, selected_genres, genre_mode,
+                                 selected_countries)
+    filtered_rows = lambda: cached_query(filter_key, 'rows', lambda: filter_catalog(df, filter_key))
+
+    # Os mesmos filtros aplicados às células do cubo pré-agregado (faixas de nota
+    # inteiras do cubo, bordas das linhas). O cubo não tem a dimensão país: com
+    # países selecionados, as células saem das linhas filtradas
+    if selected_countries:
+        cells = cached_query(filter_key, 'cells', lambda: cells_from_rows(filtered_rows()))
+        rank_cells = lambda: cached_query(filter_key, 'rank_cells', lambda: build_rank_cube(filtered_rows()))
+    else:
+        cells = cached_query(filter_key, 'cells', lambda: query_cells(
+            load_cube(version), df, load_query_index(version), key_filters(filter_key)))
+        rank_cells = lambda: cached_query(filter_key, 'rank_cells', lambda: slice_cube(
+            load_rank_cube(version), selected_years, rating_range, selected_type, selected_genres, genre_mode))
+    metrics = cached_query(filter_key, 'metrics', lambda: cube_metrics(cells['titles']))
 
     # --- EXIBIÇÃO DAS MÉTRICAS GERAIS ---
     st.subheader("📈 Métricas Gerais (com base nos filtros)")
-    if not filtered_df.empty:
+    if metrics['total']:
         col1, col2, col3, col4, col5 = st.columns(5)
         with col1:
-            st.metric("Total de Títulos", f"{len(filtered_df):,}")
+            st.metric("Total de Títulos", f"{metrics['total']:,}")
         with col2:
-            st.metric("Nota Média", f"{filtered_df['imdbAverageRating'].mean():.2f}")
+            st.metric("Nota Média", f"{metrics['avg_rating']:.2f}")
         with col3:
-            st.metric("Total de Votos", f"{filtered_df['imdbNumVotes'].sum():,}")
+            st.metric("Total de Votos", f"{metrics['total_votes']:,}")
         with col4:
-            st.metric("Média de Votos/Título", f"{filtered_df['imdbNumVotes'].mean():.0f}")
+            st.metric("Média de Votos/Título", f"{metrics['avg_votes']:.0f}")
         with col5:
-            st.metric("Desvio das Notas", f"{filtered_df['imdbAverageRating'].std():.2f}")
+            st.metric("Desvio das Notas", f"{metrics['rating_std']:.2f}")
     else:
         st.info("Nenhum título encontrado com os filtros selecionados. Tente ampliar suas escolhas.")
 
     # --- ABAS DE NAVEGAÇÃO ---
-    tab_intro, tab_pop, tab_dist, tab_evo, tab_corr, tab_data, tab_about = st.tabs([
-        "📚 Introdução", "📊 Popularidade", "🎭 Distribuição", 
-        "📅 Evolução Temporal", "🔗 Correlações", "📎 Dados Filtrados", "👩‍💻 Sobre Mim"
-    ])
-    
-    with tab_intro:
-        render_introduction_tab()
-    with tab_pop:
-        render_popularity_tab(filtered_df)
-    with tab_dist:
-        render_distribution_tab(filtered_df) 
-    with tab_evo:
-        render_temporal_evolution_tab(filtered_df)
-    with tab_corr:
-        render_correlation_tab(filtered_df)
-    with tab_data:
-        render_filtered_data_tab(filtered_df)
-    with tab_about:
-        render_about_tab()
+    tabs = {
+        "📚 Introdução": render_introduction_tab,
+        "📊 Popularidade": lambda: render_popularity_tab(cells, filter_key),
+        "🎭 Distribuição": lambda: render_distribution_tab(cells, rank_cells, filter_key),
+        "📅 Evolução Temporal": lambda: render_temporal_evolution_tab(cells, filter_key),
+        "🔗 Correlações": lambda: render_correlation_tab(cells, rank_cells, filter_key),
+        # As linhas filtradas só são selecionadas quando uma aba que as usa é aberta
+        "🌍 Países": lambda: render_countries_tab(filtered_rows(), filter_key),
+        "📎 Dados Filtrados": lambda: render_filtered_data_tab(df, filtered_rows(), filter_key),
+        "👩‍💻 Sobre Mim": render_about_tab,
+    }
+
+    if lazy_tabs:
+        active_tab = st.segmented_control("Aba:", options=list(tabs), default=list(tabs)[0], key='active_tab',
+                                          label_visibility='collapsed') or list(tabs)[0]
+        timings = {active_tab: render_timed(active_tab, tabs[active_tab])}
+    else:
+        timings = {}
+        for container, (name, render) in zip(st.tabs(list(tabs)), tabs.items()):
+            with container:
+                timings[name] = render_timed(name, render)
+
+    # Custo de cada aba nesta execução (e da última vez em que as outras foram abertas)
+    with timing_slot.container():
+        st.caption("⏱️ Tempo por aba (ms)")
+        st.dataframe(pd.DataFrame({
+            'Aba': list(st.session_state['tab_timings']),
+            'ms': [round(t * 1000) for t in st.session_state['tab_timings'].values()],
+            'Nesta execução': [name in timings for name in st.session_state['tab_timings']],
+        }), hide_index=True, use_container_width=True)
         
 else:
     st.warning("Não foi possível carregar os dados. O aplicativo não pode ser exibido.")
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Relatórios em lote para muitos recortes (segmentos) do catálogo.
+
+O catálogo é carregado e indexado uma única vez; as colunas usadas pelos
+filtros e gráficos são copiadas para blocos de memória compartilhada, e um pool
+de processos calcula métricas e figuras de cada segmento em paralelo. Cada
+segmento grava metrics.json e os PNGs no seu próprio subdiretório.
+
+Uso:
+    python batch_reports.py segmentos.yaml --output output/segmentos
+    python batch_reports.py --default-segments --workers 8
+
+Arquivo de segmentos (YAML ou JSON): lista de {name, filters}, com filters no
+mesmo formato de analyze_data, por exemplo:
+
+    - name: filmes_anos_2000
+      filters: {type: movie, years: [2000, 2009]}
+    - name: drama_e_crime
+      filters: {genres: [Drama, Crime], genre_mode: all}
+    - name: disponivel_no_brasil
+      filters: {countries: [BR]}
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from filtering import filter_mask, select_rows
+from countries import country_mask_columns, index_countries
+from genres import GENRE_MASK_COLUMN, genre_mask_columns, index_genres
+from movies_dataset import compute_metrics, generate_visualizations, load_data
+
+NUMERIC_COLUMNS = ['releaseYear', 'imdbAverageRating', 'imdbNumVotes']
+CATEGORICAL_COLUMNS = ['type', 'genres']
+
+
+def load_segments(path):
+    """Lê a lista de segmentos de um arquivo YAML (requer PyYAML) ou JSON."""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Para arquivos YAML instale o PyYAML (pip install pyyaml) ou use JSON")
+            segments = yaml.safe_load(f)
+        else:
+            segments = json.load(f)
+
+    for i, segment in enumerate(segments):
+        segment.setdefault('name', f"segmento_{i + 1:03d}")
+        segment.setdefault('filters', {})
+    return segments
+
+
+def default_segments(df):
+    """Segmentos padrão: por tipo, por década e por gênero."""
+    segments = [{'name': f"tipo_{t}", 'filters': {'type': t}} for t in sorted(df['type'].dropna().unique())]
+
+    first_decade = int(df['releaseYear'].min()) // 10 * 10
+    for decade in range(first_decade, int(df['releaseYear'].max()) + 1, 10):
+        segments.append({'name': f"decada_{decade}", 'filters': {'years': (decade, decade + 9)}})
+
+    for genre in df.attrs['genre_vocab']:
+        segments.append({'name': f"genero_{genre}", 'filters': {'genres': [genre]}})
+    return segments
+
+
+# --- MEMÓRIA COMPARTILHADA ---
+
+def share_columns(df):
+    """
+    Copia as colunas usadas nos relatórios para blocos de memória compartilhada.
+
+    Retorna (blocos, especificação): os blocos devem ser fechados e removidos
+    pelo processo principal ao final; a especificação é enviada aos workers.
+    """
+    blocks = []
+    spec = {'rows': len(df), 'arrays': {}, 'categories': {}, 'genre_vocab': df.attrs['genre_vocab'],
+            'country_vocab': df.attrs['country_vocab']}
+
+    index_columns = genre_mask_columns(df) + country_mask_columns(df)
+    arrays = {column: df[column].to_numpy() for column in NUMERIC_COLUMNS + index_columns}
+    for column in CATEGORICAL_COLUMNS:
+        codes, categories = pd.factorize(df[column])
+        arrays[column] = codes.astype(np.int32)
+        spec['categories'][column] = list(categories)
+
+    for column, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        spec['arrays'][column] = (block.name, values.dtype.str)
+    return blocks, spec
+
+
+_worker_df = None
+_worker_blocks = []
+
+
+def _attach_worker(spec):
+    """Inicializador do worker: monta um DataFrame sobre a memória compartilhada."""
+    global _worker_df
+    data = {}
+    for column, (name, dtype) in spec['arrays'].items():
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks.append(block)
+        values = np.ndarray((spec['rows'],), dtype=np.dtype(dtype), buffer=block.buf)
+        if column in spec['categories']:
+            values = pd.Categorical.from_codes(values, categories=spec['categories'][column])
+        data[column] = values
+    _worker_df = pd.DataFrame(data, copy=False)
+    _worker_df.attrs['genre_vocab'] = spec['genre_vocab']
+    _worker_df.attrs['country_vocab'] = spec['country_vocab']
+
+
+def _segment_dir(output_dir, name):
+    return os.path.join(output_dir, re.sub(r'[^\w-]+', '_', name))
+
+
+def _to_builtin(value):
+    """Escalar numpy -> Python; NaN (métricas de segmento vazio) vira None, que o JSON aceita."""
+    value = value.item() if isinstance(value, np.generic) else value
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def run_segment(segment, output_dir, plot_options=None):
+    """Filtra, calcula métricas e gera as figuras de um segmento (executa no worker)."""
+    start = time.perf_counter()
+    target = _segment_dir(output_dir, segment['name'])
+    os.makedirs(target, exist_ok=True)
+
+    mask, counts = filter_mask(_worker_df, segment['filters'])
+    filtered_df = select_rows(_worker_df, mask)
+    metrics = {key: _to_builtin(value) for key, value in compute_metrics(filtered_df).items()}
+
+    if not filtered_df.empty:
+        # Os gráficos trabalham com texto, como no pipeline de uma análise só
+        filtered_df = filtered_df.astype({column: str for column in CATEGORICAL_COLUMNS})
+        generate_visualizations(filtered_df, output_dir=target, **(plot_options or {}))
+
+    report = {
+        'name': segment['name'],
+        'filters': segment['filters'],
+        'stages': counts,
+        'metrics': metrics,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(target, 'metrics.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, allow_nan=False, default=_to_builtin)
+    return report
+
+
+def run_batch(df, segments, output_dir='output/segmentos', workers=None, plot_options=None):
+    """Executa todos os segmentos em um pool de processos sobre colunas compartilhadas."""
+    if 'genre_vocab' not in df.attrs or GENRE_MASK_COLUMN not in df.columns:
+        df = index_genres(df)
+    if 'country_vocab' not in df.attrs or not country_mask_columns(df):
+        df = index_countries(df)
+
+    blocks, spec = share_columns(df)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker, initargs=(spec,)) as pool:
+            futures = [pool.submit(run_segment, segment, output_dir, plot_options) for segment in segments]
+            reports = [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    with open(os.path.join(output_dir, 'resumo.json'), 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2, allow_nan=False, default=_to_builtin)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatórios em lote por segmento do catálogo")
+    parser.add_argument('segments', nargs='?', help="Arquivo YAML/JSON com a lista de segmentos")
+    parser.add_argument('--default-segments', action='store_true',
+                        help="Usa os segmentos padrão (por tipo, década e gênero)")
+    parser.add_argument('--data', default='data/processed/data_tratada.csv')
+    parser.add_argument('--output', default='output/segmentos')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--fast-plots', action='store_true',
+                        help="Renderização rápida a partir de dados pré-agregados (sem KDE)")
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--format', default='png', help="Formato das figuras: png, svg, pdf...")
+    args = parser.parse_args(argv)
+
+    if not args.segments and not args.default_segments:
+        parser.error("informe um arquivo de segmentos ou --default-segments")
+
+    df = load_data(args.data)
+    if df is None:
+        return
+    if GENRE_MASK_COLUMN not in df.columns:
+        df = index_genres(df)
+    if not country_mask_columns(df):
+        df = index_countries(df)
+
+    segments = load_segments(args.segments) if args.segments else default_segments(df)
+    os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    plot_options = {'backend': 'fast' if args.fast_plots else 'seaborn', 'dpi': args.dpi, 'fmt': args.format}
+    reports = run_batch(df, segments, args.output, args.workers, plot_options)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(reports)} segmentos processados em {elapsed:.1f}s com {args.workers} processos")
+    print(f"Relatórios salvos em: {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do cubo pré-agregado: tamanho de cada agregação e custo das consultas.
+
+Mostra, para o catálogo (replicado --repeat vezes), quantas células tem o cubo
+por combinação de gêneros, a agregação sem gêneros, a agregação por gênero e o
+cubo de postos, em relação às linhas que resumem. Mede o tempo de query_cells
+contra selecionar as linhas e agregá-las, e confere as métricas gerais com a
+varredura das linhas. Com --check, falha se alguma agregação passar da razão
+células/linhas máxima (uso em CI, para a granularidade não voltar a crescer).
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/bench_cube.py
+    python benchmarks/bench_cube.py --repeat 20 --check
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cube import (CUBE_SOURCE_COLUMNS, build_cube, build_cube_lattice, build_rank_cube, cube_metrics,
+                  query_cells, rollup_cube)
+from dataset_store import load_dataset
+from filtering import build_query_index, filter_positions, select_rows
+from genres import genre_mask_columns, index_genres
+
+# Filtros medidos: o padrão do app, sem gêneros e um recorte estreito fora das faixas
+QUERIES = {
+    'padrão do app': {'years': (1913, 2025), 'rating_range': (6.0, 9.0), 'type': 'Todos',
+                      'genres': ['Action', 'Comedy', 'Drama'], 'genre_mode': 'any'},
+    'sem gêneros': {'years': (1990, 2020), 'rating_range': (5.3, 8.7), 'type': 'Todos', 'genres': []},
+    'filmes, E': {'years': (2000, 2010), 'rating_range': (7.2, 7.9), 'type': 'movie',
+                  'genres': ['Drama', 'Crime'], 'genre_mode': 'all'},
+}
+
+
+def _timed(func, *args, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/processed/data_tratada.csv')
+    parser.add_argument('--repeat', type=int, default=1, help='Quantas vezes replicar o catálogo')
+    parser.add_argument('--check', action='store_true', help="Falha se uma razão células/linhas passar do máximo")
+    parser.add_argument('--max-cube-ratio', type=float, default=0.65,
+                        help="Máximo de células do cubo por combinação de gêneros / linhas")
+    parser.add_argument('--max-rollup-ratio', type=float, default=0.1,
+                        help="Máximo de células da agregação sem gêneros / linhas")
+    parser.add_argument('--max-genre-ratio', type=float, default=0.25,
+                        help="Máximo de células da agregação por gênero / pares (título, gênero)")
+    args = parser.parse_args()
+
+    base, _ = load_dataset(args.data)
+    catalog = index_genres(pd.concat([base] * args.repeat, ignore_index=True))
+    lattice, t_build = _timed(build_cube_lattice, catalog, repeat=1)
+    rank, _ = _timed(build_rank_cube, catalog, repeat=1)
+    index = build_query_index(catalog)
+
+    # Cada par (título, gênero) conta uma vez na agregação por gênero
+    title_genres = int(lattice['genres']['count'].sum())
+    sizes = [
+        ('cubo (combinações)', len(lattice['cube']), len(catalog), args.max_cube_ratio),
+        ('sem gêneros', len(lattice['titles']), len(catalog), args.max_rollup_ratio),
+        ('por gênero', len(lattice['genres']), title_genres, args.max_genre_ratio),
+        ('postos (nota exata)', len(rank), len(catalog), None),
+    ]
+    print(f"Linhas: {len(catalog):,} | cubo e agregações montados em {t_build:.3f}s\n")
+    print(f"{'agregação':22s} {'células':>10s} {'linhas':>10s} {'razão':>7s} {'máximo':>7s}")
+    failures = []
+    for name, cells, rows, limit in sizes:
+        ratio = cells / rows
+        print(f"{name:22s} {cells:10,} {rows:10,} {ratio:7.3f} {limit if limit is not None else '-':>7}")
+        if limit is not None and ratio > limit:
+            failures.append(f"{name}: {ratio:.3f} células por linha (máximo {limit})")
+
+    columns = CUBE_SOURCE_COLUMNS + genre_mask_columns(catalog)
+    print(f"\n{'consulta':16s} {'células':>9s} {'cubo':>9s} {'linhas':>9s}")
+    for name, filters in QUERIES.items():
+        cells, t_cube = _timed(query_cells, lattice, catalog, index, filters)
+
+        def from_rows():
+            positions, _ = filter_positions(catalog, filters, index)
+            return positions, cube_metrics(rollup_cube(build_cube(select_rows(catalog, positions, columns))))
+        (positions, _), t_rows = _timed(from_rows)
+
+        metrics = cube_metrics(cells['titles'])
+        rows = catalog.take(positions)
+        if metrics['total'] != len(rows) or not np.isclose(metrics['total_votes'], rows['imdbNumVotes'].sum()):
+            raise SystemExit(f"ERRO: métricas do cubo diferem das linhas em '{name}'")
+        print(f"{name:16s} {len(cells['titles']):9,} {t_cube * 1000:7.1f}ms {t_rows * 1000:7.1f}ms")
+
+    for failure in failures:
+        print(f"\nGRANULARIDADE: {failure}")
+    if args.check and failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
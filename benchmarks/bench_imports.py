@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de partida: custo de import de cada módulo, medido com `python -X importtime`.
+
+Cada alvo é importado em um processo novo (o melhor de --repeat execuções).
+Para cada um são registrados o tempo total de imports, o tempo de parede do
+processo e os pacotes mais caros. Os módulos do núcleo (carga, pré-processamento,
+filtros, métricas) não podem carregar bibliotecas de gráficos ou de imputação
+KNN na importação. Os resultados são anexados a um histórico JSON. Com --check,
+a execução falha se um módulo do núcleo importar um pacote pesado ou se algum
+alvo ficar mais lento que a tolerância em relação à última execução (uso em CI).
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --check --tolerance 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'import_history.json')
+
+# Alvo -> código executado no processo novo
+TARGETS = {
+    'genres': 'import genres',
+    'filtering': 'import filtering',
+    'dataset_store': 'import dataset_store',
+    'imputation': 'import imputation',
+    'cube': 'import cube',
+    'plotting': 'import plotting',
+    'movies_dataset': 'import movies_dataset',
+    'batch_reports': 'import batch_reports',
+    'app (dependências)': 'import streamlit, cube, dataset_store, query_cache, filtering, genres, '
+                          'instrumentation, export, pagination',
+}
+
+# Módulos que só devem ser importados no primeiro gráfico ou na imputação KNN
+# (o próprio streamlit importa o pacote plotly, mas não o plotly.express)
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly.express', 'sklearn', 'scipy')
+
+
+def import_profile(code):
+    """
+    Roda code com -X importtime; retorna (µs por pacote, módulos pesados
+    importados, µs total, segundos de parede).
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"ERRO ao importar ({code}):\n{result.stderr[-2000:]}")
+
+    # Linhas "import time: self [us] | cumulative | imported package"
+    packages, heavy = {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        top = name.split('.')[0]
+        packages[top] = packages.get(top, 0) + int(self_us)
+        heavy.update(module for module in HEAVY_MODULES if name == module or name.startswith(module + '.'))
+    return packages, heavy, sum(packages.values()), wall
+
+
+def measure_target(code, repeat):
+    """Melhor de repeat execuções (a primeira também aquece o cache de bytecode)."""
+    runs = [import_profile(code) for _ in range(repeat)]
+    packages, heavy, total, _ = min(runs, key=lambda run: run[2])
+    return {
+        'import_ms': round(total / 1000, 1),
+        'wall_ms': round(min(run[3] for run in runs) * 1000, 1),
+        'heavy': sorted(heavy),
+        'top': {name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda i: -i[1])[:5]},
+    }
+
+
+def _load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_regressions(history, record, tolerance):
+    """Alvos mais lentos que (1 + tolerance) vezes a última execução."""
+    if not history:
+        return []
+    previous = history[-1]['targets']
+    return [(name, previous[name]['import_ms'], result['import_ms'])
+            for name, result in record['targets'].items()
+            if name in previous and result['import_ms'] > previous[name]['import_ms'] * (1 + tolerance)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="Arquivo JSON do histórico")
+    parser.add_argument('--check', action='store_true',
+                        help="Falha se o núcleo importar pacotes pesados ou houver regressão de tempo")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Folga relativa do --check")
+    args = parser.parse_args()
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'targets': {},
+    }
+    print(f"{'alvo':24s} {'imports':>10s} {'processo':>10s}  pacotes mais caros")
+    for name in args.targets:
+        result = measure_target(TARGETS[name], args.repeat)
+        record['targets'][name] = result
+        top = ', '.join(f"{package} {ms:.0f}" for package, ms in result['top'].items())
+        heavy = f"  PESADOS: {', '.join(result['heavy'])}" if result['heavy'] else ''
+        print(f"{name:24s} {result['import_ms']:8.1f}ms {result['wall_ms']:8.1f}ms  {top}{heavy}")
+
+    history = _load_history(args.history)
+    regressions = find_regressions(history, record, args.tolerance)
+    with open(args.history, 'w', encoding='utf-8') as f:
+        json.dump(history + [record], f, ensure_ascii=False, indent=2)
+    print(f"\nResultados anexados a: {args.history}")
+
+    failures = [f"{name} importa {', '.join(result['heavy'])} na partida"
+                for name, result in record['targets'].items() if result['heavy']]
+    failures += [f"REGRESSÃO {name}: {before:.1f}ms -> {after:.1f}ms" for name, before, after in regressions]
+    for failure in failures:
+        print(failure)
+    if args.check and failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
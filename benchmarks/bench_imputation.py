@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: KNNImputer completo vs imputação 'fast' (KD-tree só nas linhas ausentes).
+
+Além das linhas já sem avaliação no CSV bruto, apaga aleatoriamente a nota ou os
+votos de parte das linhas completas, para exercitar a busca de vizinhos. Cada
+valor imputado é conferido contra os k vizinhos mais próximos recalculados
+(aceitando qualquer desempate no k-ésimo), inclusive em um catálogo sintético
+sem empates, com linhas parcialmente ausentes. O catálogo sintético também
+passa pelo modo em blocos (preprocess_in_chunks) com dois tamanhos de bloco,
+que têm de dar o mesmo resultado.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/bench_imputation.py --holes 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from imputation import IMPUTED_COLS, fast_knn_impute, knn_impute
+from movies_dataset import preprocess_in_chunks
+
+
+def _timed(func, df, **kwargs):
+    start = time.perf_counter()
+    result = func(df.copy(), **kwargs)
+    return result, time.perf_counter() - start
+
+
+def neighbor_mean_range(donor_keys, donor_values, key, n_neighbors, atol=1e-9):
+    """
+    Menor e maior média possíveis entre os conjuntos de k vizinhos mais próximos.
+
+    Os doadores estritamente mais próximos que o k-ésimo entram sempre; as vagas
+    restantes podem ir para qualquer doador empatado na distância do k-ésimo
+    (dentro de atol), então a média válida fica entre os extremos desses conjuntos.
+    """
+    dist = np.abs(donor_keys - key)
+    kth = np.partition(dist, n_neighbors - 1)[n_neighbors - 1]
+    closer = dist < kth - atol
+    tied = np.sort(donor_values[np.abs(dist - kth) <= atol])
+    free = n_neighbors - int(closer.sum())
+    base = donor_values[closer].sum()
+    return (base + tied[:free].sum()) / n_neighbors, (base + tied[-free:].sum()) / n_neighbors
+
+
+def check_against_neighbors(df, result, n_neighbors=3, label='', whole_votes=False):
+    """
+    Confere cada valor imputado (linhas com uma das colunas observada) contra os
+    k vizinhos mais próximos recalculados entre as linhas completas.
+    Com whole_votes, os votos imputados saíram de preprocess_data (arredondados).
+    Retorna quantos valores foram conferidos.
+    """
+    complete = df.dropna(subset=IMPUTED_COLS)
+    checked = 0
+    for col in IMPUTED_COLS:
+        other = [c for c in IMPUTED_COLS if c != col][0]
+        rows = np.flatnonzero((df[col].isna() & df[other].notna()).to_numpy())
+        donor_keys, donor_values = complete[other].to_numpy(), complete[col].to_numpy()
+        for i in rows:
+            low, high = neighbor_mean_range(donor_keys, donor_values, df[other].iat[i], n_neighbors)
+            if whole_votes and col == 'imdbNumVotes':
+                low, high = np.rint(low), np.rint(high)
+            value = result[col].iat[i]
+            if not (np.isclose(value, low) or np.isclose(value, high) or low <= value <= high):
+                raise SystemExit(f"ERRO{label}: {col} na linha {i} = {value} fora de [{low}, {high}]")
+        checked += len(rows)
+    return checked
+
+
+def synthetic_frame(rows, seed):
+    """Notas e votos contínuos (sem empates de distância) com linhas só parcialmente ausentes."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'imdbAverageRating': rng.uniform(1, 10, rows),
+        'imdbNumVotes': rng.lognormal(8, 2, rows),
+        'type': rng.choice(['movie', 'tv'], rows),
+        'releaseYear': rng.integers(1950, 2025, rows),
+    })
+    holes = rng.choice(rows, rows // 5, replace=False)
+    half = len(holes) // 2
+    df.loc[holes[:half], 'imdbAverageRating'] = np.nan
+    df.loc[holes[half:], 'imdbNumVotes'] = np.nan
+    return df
+
+
+def chunked_results(df, chunksizes):
+    """Resultado de preprocess_in_chunks sobre df (gravado como CSV bruto) para cada tamanho de bloco."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'raw.csv')
+        df.assign(title='t', genres='Drama').to_csv(raw_path, index=False, encoding='utf-8-sig')
+        for chunksize in chunksizes:
+            output_path = os.path.join(tmp, f'out_{chunksize}.csv')
+            # As mensagens de progresso de cada bloco não interessam aqui
+            with contextlib.redirect_stdout(io.StringIO()):
+                preprocess_in_chunks(raw_path, output_path, chunksize=chunksize)
+            results[chunksize] = pd.read_csv(output_path, encoding='utf-8-sig')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/raw/data.csv')
+    parser.add_argument('--holes', type=int, default=2000, help='Valores apagados artificialmente')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic-rows', type=int, default=5000, help='Linhas do caso sintético')
+    parser.add_argument('--chunksizes', type=int, nargs=2, default=[700, 2500],
+                        help='Dois tamanhos de bloco comparados no modo em blocos')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    for col in IMPUTED_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    rng = np.random.default_rng(args.seed)
+    complete_rows = np.flatnonzero(df[IMPUTED_COLS].notna().all(axis=1).to_numpy())
+    holes = rng.choice(complete_rows, min(args.holes, len(complete_rows)), replace=False)
+    half = len(holes) // 2
+    df.loc[df.index[holes[:half]], 'imdbAverageRating'] = np.nan
+    df.loc[df.index[holes[half:]], 'imdbNumVotes'] = np.nan
+    print(f"Linhas: {len(df):,} | com ausências: {df[IMPUTED_COLS].isna().any(axis=1).sum():,}")
+
+    reference, t_knn = _timed(knn_impute, df)
+    fast, t_fast = _timed(fast_knn_impute, df)
+    stratified, t_strat = _timed(fast_knn_impute, df, stratify=True, batch_size=512)
+
+    print(f"KNNImputer completo: {t_knn:.3f}s")
+    print(f"fast (KD-tree):      {t_fast:.3f}s ({t_knn / t_fast:.0f}x)")
+    print(f"fast estratificado:  {t_strat:.3f}s (tipo + década, lotes de 512)")
+
+    # Com empates na distância do k-ésimo vizinho a escolha é arbitrária: cada
+    # valor imputado (das duas versões) tem de ser a média de um conjunto válido
+    for col in IMPUTED_COLS:
+        diff = int(np.count_nonzero(~np.isclose(reference[col], fast[col])))
+        print(f"{col}: {len(df) - diff:,}/{len(df):,} idênticos ao KNNImputer")
+    checked = check_against_neighbors(df, fast, label=' (fast)')
+    print(f"Vizinhos conferidos: {checked:,} valores imputados de fast são médias de k vizinhos mais próximos válidos")
+
+    # Caso sintético: linhas parcialmente ausentes e valores contínuos, sem empates,
+    # então cada valor tem uma única resposta (a média dos k vizinhos exatos)
+    synthetic = synthetic_frame(args.synthetic_rows, args.seed)
+    for name, result in [('fast', fast_knn_impute(synthetic.copy())),
+                         ('fast em lotes', fast_knn_impute(synthetic.copy(), batch_size=97))]:
+        check_against_neighbors(synthetic, result, label=f" ({name}, sintético)")
+    expected = knn_impute(synthetic.copy())
+    agree = int(np.isclose(expected[IMPUTED_COLS], fast_knn_impute(synthetic.copy())[IMPUTED_COLS]).all(axis=1).sum())
+    # O KNNImputer calcula distâncias como x² + y² - 2xy, que perde precisão entre
+    # valores próximos; as poucas divergências vêm dele, não da KD-tree
+    print(f"Sintético: {synthetic[IMPUTED_COLS].isna().any(axis=1).sum():,} linhas parcialmente ausentes "
+          f"conferidas contra os vizinhos exatos; {agree:,}/{len(synthetic):,} iguais ao KNNImputer")
+
+    # Modo em blocos: os vizinhos vêm do catálogo inteiro, então o tamanho do bloco não muda nada
+    chunked = chunked_results(synthetic, args.chunksizes)
+    first, second = (chunked[size][IMPUTED_COLS].to_numpy() for size in args.chunksizes)
+    if not np.allclose(first, second):
+        changed = int((~np.isclose(first, second)).any(axis=1).sum())
+        raise SystemExit(f"ERRO: {changed} linhas mudam entre blocos de {args.chunksizes[0]} e {args.chunksizes[1]}")
+    for size in args.chunksizes:
+        check_against_neighbors(synthetic, chunked[size], label=f" (blocos de {size})", whole_votes=True)
+    print(f"Blocos de {args.chunksizes[0]} e {args.chunksizes[1]} linhas: mesmo resultado, "
+          f"conferido contra os vizinhos do catálogo inteiro")
+
+
+if __name__ == "__main__":
+    main()
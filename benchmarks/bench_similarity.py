@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: títulos parecidos, laço Python por candidato vs motor vetorizado.
+
+O catálogo é replicado --repeat vezes. É medida a vazão (consultas por
+segundo) de --single consultas feitas uma a uma e de um lote de --batch
+consultas sobre o catálogo inteiro; o lote tem de devolver as mesmas
+pontuações das consultas isoladas. As pontuações das primeiras consultas são
+conferidas contra o laço ingênuo (sobre uma amostra de --check-rows linhas,
+para o laço terminar em tempo razoável). Com --check, falha se o lote não
+tiver vazão maior que as consultas isoladas.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/bench_similarity.py --repeat 100 --batch 256 --check
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_store import load_dataset
+from genres import index_genres
+from similarity import SIMILARITY_WEIGHTS, build_similarity_index, similar_titles
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def naive_scores(index, query, candidates):
+    """Pontuação candidato a candidato, com conjuntos de gêneros em Python."""
+    masks = index['masks']
+
+    def genre_set(row):
+        return {word * 64 + bit for word, value in enumerate(masks[row]) for bit in range(64) if (int(value) >> bit) & 1}
+
+    query_genres = genre_set(query)
+    scores = []
+    for row in candidates:
+        genres = genre_set(row)
+        union = len(query_genres | genres)
+        score = SIMILARITY_WEIGHTS['genres'] * (len(query_genres & genres) / union if union else 0.0)
+        for name, values in index['features'].items():
+            score += SIMILARITY_WEIGHTS[name] * (1 - abs(float(values[query]) - float(values[row])))
+        scores.append(score)
+    return np.array(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/processed/data_tratada.csv')
+    parser.add_argument('--repeat', type=int, default=100, help='Quantas vezes replicar o catálogo')
+    parser.add_argument('--batch', type=int, default=256, help='Consultas no lote')
+    parser.add_argument('--single', type=int, default=16, help='Consultas feitas uma a uma')
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--check-rows', type=int, default=20_000, help='Linhas da amostra conferida no laço')
+    parser.add_argument('--check', action='store_true', help='Falha se o lote não for mais rápido por consulta')
+    args = parser.parse_args()
+
+    base, _ = load_dataset(args.data)
+    catalog = index_genres(pd.concat([base] * args.repeat, ignore_index=True))
+    index, t_build = _timed(build_similarity_index, catalog)
+    print(f"Linhas: {len(catalog):,} | índice montado em {t_build:.3f}s")
+
+    rng = np.random.default_rng(0)
+    queries = rng.choice(len(catalog), size=args.batch, replace=False)
+
+    similar_titles(index, queries[:1], args.k)  # aquecimento
+    singles = queries[:args.single]
+    single_scores, t_single = _timed(lambda: [similar_titles(index, query, args.k)[1][0] for query in singles])
+    (positions, scores), t_batch = _timed(similar_titles, index, queries, args.k)
+    single_rate, batch_rate = len(singles) / t_single, len(queries) / t_batch
+    print(f"{len(singles)} consultas isoladas:  {t_single / len(singles) * 1000:.2f} ms por consulta "
+          f"({single_rate:,.0f} consultas/s)")
+    print(f"{args.batch} consultas em lote: {t_batch / args.batch * 1000:.2f} ms por consulta "
+          f"({batch_rate:,.0f} consultas/s, {batch_rate / single_rate:.1f}x)")
+    if not np.allclose(np.array(single_scores), scores[:len(singles)], atol=1e-6):
+        raise SystemExit("ERRO: o lote e as consultas isoladas deram pontuações diferentes")
+
+    # Conferência: o k-ésimo melhor do laço ingênuo bate com o do motor sobre a mesma amostra
+    sample = np.sort(rng.choice(len(catalog), size=min(args.check_rows, len(catalog)), replace=False))
+    (sample_positions, sample_scores), _ = _timed(similar_titles, index, queries[:3], args.k, candidates=sample)
+    t_naive = 0.0
+    for query, top_scores in zip(queries[:3], sample_scores):
+        candidates = sample[sample != query]
+        expected, elapsed = _timed(naive_scores, index, query, candidates)
+        t_naive += elapsed
+        expected = np.sort(expected)[::-1][:args.k]
+        if not np.allclose(expected, top_scores, atol=1e-5):
+            raise SystemExit(f"ERRO: pontuações diferentes para a consulta {query}")
+    print(f"Laço ingênuo ({len(sample):,} candidatos): {t_naive / 3 * 1000:.1f} ms por consulta (mesmos top-{args.k})")
+    if args.check and batch_rate <= single_rate:
+        raise SystemExit("REGRESSÃO: o lote não tem vazão maior que as consultas isoladas")
+
+
+if __name__ == "__main__":
+    main()
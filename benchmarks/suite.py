@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Suíte de benchmarks do pipeline: load -> preprocess -> filter -> aggregate -> plot.
+
+Gera catálogos sintéticos com as mesmas colunas de data/raw/data.csv (strings de
+gênero com as variações reais, separadores e caixas diferentes, avaliações
+ausentes), mede tempo e pico de memória de cada estágio e anexa os resultados a
+um histórico JSON. O tempo é medido com o tracemalloc desligado (ele deixa cada
+alocação bem mais cara); o pico de memória sai de uma segunda passada, com o
+tracemalloc ligado, que --skip-memory dispensa. Com --check, compara com a
+última execução do mesmo tamanho medida da mesma forma e falha se algum estágio
+ficou mais lento que a tolerância.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/suite.py --sizes 20000 1000000 10000000
+    python benchmarks/suite.py --sizes 20000 --check --tolerance 0.25 --skip-memory
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from countries import index_countries
+from filtering import build_query_index
+from genres import clean_and_standardize_genres, index_genres, standardize_genres
+from movies_dataset import analyze_data, apply_filters, generate_visualizations, load_data, preprocess_data
+
+DEFAULT_SIZES = [20_000, 1_000_000, 10_000_000]
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'history.json')
+DEFAULT_FILTERS = {
+    'years': (2000, 2023),
+    'rating_range': (6.0, 10.0),
+    'type': 'movie',
+    'genres': ['Action', 'Adventure', 'Comedy'],
+}
+
+# Variações de gêneros vistas no catálogo bruto e em outras fontes
+GENRE_VARIANTS = [
+    'Action', 'Adventure', 'Action & Adventure', 'Action-Adventure', 'Animation', 'Biography',
+    'Comedy', 'Crime', 'Documentary', 'Drama', 'Family', 'Fantasy', 'Film-Noir', 'Game-Show',
+    'History', 'Horror', 'Kids', 'Music', 'Musical', 'Mystery', 'News', 'Reality', 'Reality-TV',
+    'Romance', 'Sci-Fi', 'Sci-Fi & Fantasy', 'Science Fiction', 'Short', 'Soap', 'Sport',
+    'Talk-Show', 'Thriller', 'TV Movie', 'War', 'War & Politics', 'Western',
+]
+SEPARATORS = [', ', ',', ' / ', '; ', ' & ']
+
+
+def _genre_pool(rng, size=5000):
+    """Strings de gênero distintas: as do CSV bruto mais combinações sintéticas."""
+    pool = []
+    raw_path = os.path.join(ROOT, 'data', 'raw', 'data.csv')
+    if os.path.exists(raw_path):
+        pool.extend(pd.read_csv(raw_path, usecols=['genres'])['genres'].dropna().unique())
+
+    for _ in range(size - len(pool)):
+        tokens = rng.choice(GENRE_VARIANTS, size=rng.integers(1, 4), replace=False)
+        tokens = [t.lower() if rng.random() < 0.1 else t for t in tokens]
+        text = str(rng.choice(SEPARATORS)).join(tokens)
+        if rng.random() < 0.05:
+            text = str([str(t) for t in tokens])
+        pool.append(text)
+    return np.asarray(pool, dtype=object)
+
+
+def make_catalog(n, seed=0):
+    """Catálogo sintético com n linhas no formato de data/raw/data.csv."""
+    rng = np.random.default_rng(seed)
+    pool = _genre_pool(rng)
+    # Distribuição de Zipf: poucas combinações muito frequentes, cauda longa
+    weights = 1.0 / np.arange(1, len(pool) + 1)
+    genres = pool[rng.choice(len(pool), size=n, p=weights / weights.sum())]
+    genres[rng.random(n) < 0.02] = None
+
+    years = rng.integers(1920, 2026, size=n).astype(np.float64)
+    recent = rng.random(n) < 0.6
+    years[recent] = rng.integers(2010, 2026, size=recent.sum())
+    years[rng.random(n) < 0.002] = np.nan
+
+    rating = np.clip(np.round(rng.normal(6.4, 1.1, size=n), 1), 1.0, 10.0)
+    votes = np.round(rng.lognormal(7.5, 2.0, size=n))
+    missing = rng.random(n) < 0.08
+    rating[missing] = np.nan
+    votes[missing] = np.nan
+
+    countries = np.full(n, None, dtype=object)
+    with_countries = rng.random(n) < 0.01
+    countries[with_countries] = rng.choice(['BR, PT', 'TZ', 'US, CA, MX', 'AD, AE, AG, AL'],
+                                           size=with_countries.sum())
+
+    ids = pd.Series(np.arange(n)).astype(str)
+    return pd.DataFrame({
+        'title': 'Title ' + ids,
+        'type': np.where(rng.random(n) < 0.75, 'movie', 'tv'),
+        'genres': genres,
+        'releaseYear': years,
+        'imdbId': 'tt' + ids.str.zfill(8),
+        'imdbAverageRating': rating,
+        'imdbNumVotes': votes,
+        'availableCountries': countries,
+    })
+
+
+class StageTimer:
+    """
+    Mede cada estágio: o tempo (trace_memory=False) ou o pico de memória pelo
+    tracemalloc (trace_memory=True, que precisa de tracemalloc.start()).
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        record = {'rows_in': rows_in}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_current, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        # Os estágios imprimem diagnósticos; aqui só interessam as medidas
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield record
+        elapsed = time.perf_counter() - start
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            record['peak_mb'] = round((peak - start_current) / 1024 ** 2, 1)
+            print(f"  {name:32s} pico {record['peak_mb']:9.1f} MB")
+        else:
+            record['seconds'] = round(elapsed, 4)
+            print(f"  {name:32s} {record['seconds']:9.3f}s")
+        self.results[name] = record
+
+
+def write_catalog(n, seed, workdir):
+    """Grava o catálogo sintético de n linhas como CSV bruto e retorna o caminho."""
+    raw_path = os.path.join(workdir, f"catalogo_{n}.csv")
+    make_catalog(n, seed).to_csv(raw_path, index=False)
+    print(f"\n=== {n:,} linhas ({os.path.getsize(raw_path) / 1024 ** 2:.0f} MB de CSV) ===")
+    return raw_path
+
+
+def run_stages(raw_path, n, rowwise_limit, workdir, timer, seaborn=False):
+    """Executa todos os estágios para o catálogo de n linhas em raw_path."""
+    with timer.stage('load_data', n) as r:
+        df = load_data(raw_path)
+        r['rows_out'] = len(df)
+
+    sample = df['genres'].fillna('Unknown').iloc[:rowwise_limit]
+    with timer.stage('clean_and_standardize_genres', len(sample)) as r:
+        r['rows_out'] = len(sample.apply(clean_and_standardize_genres))
+    with timer.stage('standardize_genres', n) as r:
+        r['rows_out'] = len(standardize_genres(df['genres'].fillna('Unknown')))
+
+    with timer.stage('preprocess_data', n) as r:
+        df = preprocess_data(df)
+        r['rows_out'] = len(df)
+    with timer.stage('index_genres', n):
+        df = index_genres(df)
+    with timer.stage('index_countries', n):
+        df = index_countries(df)
+    with timer.stage('build_query_index', n):
+        index = build_query_index(df)
+
+    with timer.stage('apply_filters', n) as r:
+        r['rows_out'] = len(apply_filters(df, DEFAULT_FILTERS))
+    with timer.stage('apply_filters_indexed', n) as r:
+        r['rows_out'] = len(apply_filters(df, DEFAULT_FILTERS, index=index))
+
+    output_dir = os.path.join(workdir, f"figuras_{n}")
+    with timer.stage('analyze_data', n):
+        analyze_data(df, DEFAULT_FILTERS, backend='fast', dpi=100, output_dir=output_dir)
+    with timer.stage('generate_visualizations_fast', n):
+        generate_visualizations(df, output_dir, backend='fast', dpi=100)
+    if seaborn:
+        with timer.stage('generate_visualizations_seaborn', n):
+            generate_visualizations(df, output_dir, backend='seaborn', dpi=100)
+    return timer.results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_size(n, seed, rowwise_limit, workdir, seaborn=False, memory=True):
+    """
+    Mede todos os estágios para um catálogo de n linhas: tempos numa passada
+    sem tracemalloc e, com memory, picos de memória numa segunda passada.
+    """
+    raw_path = write_catalog(n, seed, workdir)
+    print("-- tempo --")
+    stages = run_stages(raw_path, n, rowwise_limit, workdir, StageTimer(), seaborn)
+    if memory:
+        print("-- pico de memória (tracemalloc) --")
+        tracemalloc.start()
+        try:
+            traced = run_stages(raw_path, n, rowwise_limit, workdir, StageTimer(trace_memory=True), seaborn)
+        finally:
+            tracemalloc.stop()
+        for name, result in traced.items():
+            stages[name]['peak_mb'] = result['peak_mb']
+    return stages
+
+
+def find_regressions(history, record, tolerance):
+    """
+    Estágios mais lentos que (1 + tolerance) vezes a última execução do mesmo
+    tamanho. Execuções antigas, cronometradas com o tracemalloc ligado, não
+    servem de base.
+    """
+    previous = next((h for h in reversed(history)
+                     if h['rows'] == record['rows'] and h.get('timing') == record['timing']), None)
+    if previous is None:
+        return []
+    regressions = []
+    for stage, result in record['stages'].items():
+        before = previous['stages'].get(stage)
+        if before and before['seconds'] > 0 and result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append((stage, before['seconds'], result['seconds']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rowwise-limit', type=int, default=200_000,
+                        help="Máximo de linhas para a versão linha a linha (apply)")
+    parser.add_argument('--seaborn', action='store_true', help="Inclui o backend seaborn das figuras")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="Arquivo JSON do histórico")
+    parser.add_argument('--check', action='store_true', help="Falha se houver regressão de tempo")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Folga relativa do --check")
+    parser.add_argument('--skip-memory', action='store_true',
+                        help="Só mede o tempo (sem a passada do tracemalloc)")
+    args = parser.parse_args()
+
+    history = _load_history(args.history)
+    records, regressions = [], []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            record = {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': _git_commit(),
+                'rows': n,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                # Tempos medidos sem tracemalloc (não comparáveis com os do histórico antigo)
+                'timing': 'untraced',
+                'stages': run_size(n, args.seed, args.rowwise_limit, workdir, args.seaborn,
+                                   memory=not args.skip_memory),
+            }
+            regressions.extend((n, *r) for r in find_regressions(history, record, args.tolerance))
+            records.append(record)
+
+    with open(args.history, 'w', encoding='utf-8') as f:
+        json.dump(history + records, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados anexados a: {args.history}")
+
+    for n, stage, before, after in regressions:
+        print(f"REGRESSÃO ({n:,} linhas) {stage}: {before:.3f}s -> {after:.3f}s")
+    if args.check and regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de disponibilidade por país (coluna availableCountries).
+
+A string de países (códigos ISO separados por vírgula) é padronizada uma vez no
+pré-processamento. O índice guarda, para cada título, um conjunto de bits
+dividido em palavras de 64 bits (colunas country_mask_0, country_mask_1, ...),
+com o vocabulário de códigos em df.attrs['country_vocab']; o país vocab[i]
+corresponde ao bit i % 64 da palavra i // 64. Filtros e contagens por país
+viram operações bit a bit vetorizadas, sem busca de substring na consulta.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+COUNTRY_MASK_PREFIX = 'country_mask_'
+WORD_BITS = 64
+COUNTRY_MATCH_MODES = ('any', 'all', 'none')
+
+# Linhas por bloco ao expandir os bits em contagens por país
+STATS_CHUNK_ROWS = 1_000_000
+
+_SEPARATORS = re.compile(r'[\s,;/|]+')
+
+
+def _standardize_unique(value):
+    codes = sorted({code.upper() for code in _SEPARATORS.split(value) if code})
+    return ', '.join(codes) if codes else np.nan
+
+
+def standardize_countries(series):
+    """
+    Padroniza a coluna de países: códigos em maiúsculas, sem repetição, em
+    ordem alfabética e separados por ', '. Cada string distinta é tratada uma vez.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    cleaned = np.asarray([_standardize_unique(str(value)) for value in uniques] + [np.nan], dtype=object)
+    # O sentinela -1 (nulos) aponta para a última posição
+    return pd.Series(cleaned[codes], index=series.index, name=series.name)
+
+
+def country_mask_columns(df):
+    """Colunas de palavras do índice de países presentes em df, em ordem."""
+    columns = [c for c in df.columns if isinstance(c, str) and c.startswith(COUNTRY_MASK_PREFIX)]
+    return sorted(columns, key=lambda c: int(c[len(COUNTRY_MASK_PREFIX):]))
+
+
+def build_country_index(countries):
+    """
+    Constrói o índice de países a partir da coluna padronizada.
+
+    Retorna (máscaras, vocabulário): um array uint64 linhas × palavras e a
+    lista ordenada de códigos de país.
+    """
+    codes, uniques = pd.factorize(countries, use_na_sentinel=True)
+    tokens = pd.Series(np.asarray(uniques, dtype=object)).str.split(',').explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != '')]
+
+    vocab = sorted(tokens.unique())
+    n_words = max((len(vocab) + WORD_BITS - 1) // WORD_BITS, 1)
+    bits = pd.Index(vocab).get_indexer(tokens.to_numpy()).astype(np.uint64)
+    unique_masks = np.zeros((len(uniques) + 1, n_words), dtype=np.uint64)
+    np.bitwise_or.at(unique_masks, (tokens.index.to_numpy(), (bits // WORD_BITS).astype(np.intp)),
+                     np.left_shift(np.uint64(1), bits % np.uint64(WORD_BITS)))
+    # O sentinela -1 (nulos) aponta para a última posição: nenhum país
+    return unique_masks[codes], vocab
+
+
+def index_countries(df):
+    """Adiciona as colunas do índice de países e guarda o vocabulário em df.attrs."""
+    masks, vocab = build_country_index(df['availableCountries'])
+    for column in country_mask_columns(df):
+        del df[column]
+    for word in range(masks.shape[1]):
+        df[f"{COUNTRY_MASK_PREFIX}{word}"] = masks[:, word]
+    df.attrs['country_vocab'] = vocab
+    return df
+
+
+def get_country_index(df, positions=None):
+    """
+    Retorna (máscaras, vocabulário) do DataFrame, construindo o índice se
+    necessário. Com positions, só as máscaras dessas linhas.
+    """
+    vocab = df.attrs.get('country_vocab')
+    columns = country_mask_columns(df)
+    if columns and vocab is not None:
+        rows = slice(None) if positions is None else positions
+        return np.column_stack([df[c].to_numpy(dtype=np.uint64)[rows] for c in columns]), vocab
+    masks, vocab = build_country_index(df['availableCountries'])
+    return (masks if positions is None else masks[positions]), vocab
+
+
+def countries_to_mask(vocab, countries, n_words):
+    """
+    Converte uma lista de países nas palavras de bits correspondentes.
+
+    Retorna (máscara, todos_conhecidos): países fora do vocabulário não têm bit.
+    """
+    positions = pd.Index(vocab).get_indexer(list(countries))
+    known = positions[positions >= 0].astype(np.uint64)
+    mask = np.zeros(n_words, dtype=np.uint64)
+    np.bitwise_or.at(mask, (known // WORD_BITS).astype(np.intp),
+                     np.left_shift(np.uint64(1), known % np.uint64(WORD_BITS)))
+    return mask, bool((positions >= 0).all())
+
+
+def match_countries(masks, vocab, countries, mode='any'):
+    """
+    Seleção exata de países por operações bit a bit (mesmos modos de genres.match_genres).
+
+    mode='any': disponível em pelo menos um dos países
+    mode='all': disponível em todos os países
+    mode='none': indisponível em todos os países
+    """
+    if mode not in COUNTRY_MATCH_MODES:
+        raise ValueError(f"Modo de países inválido: {mode!r} (use {COUNTRY_MATCH_MODES})")
+
+    selected, all_known = countries_to_mask(vocab, countries, masks.shape[1])
+    hits = masks & selected
+    if mode == 'any':
+        return (hits != 0).any(axis=1)
+    if mode == 'all':
+        if not all_known:
+            return np.zeros(len(masks), dtype=bool)
+        return (hits == selected).all(axis=1)
+    return (hits == 0).all(axis=1)
+
+
+def get_unique_countries(df):
+    """Lista ordenada dos países presentes no DataFrame, consultada no índice."""
+    masks, vocab = get_country_index(df)
+    present = np.bitwise_or.reduce(masks, axis=0, initial=np.uint64(0))
+    return [code for bit, code in enumerate(vocab) if (int(present[bit // WORD_BITS]) >> (bit % WORD_BITS)) & 1]
+
+
+def country_stats(df, chunk_rows=STATS_CHUNK_ROWS):
+    """
+    Títulos, nota média e média de votos por país.
+
+    Só as linhas com algum país entram; os bits são expandidos em blocos de
+    chunk_rows linhas e somados com produtos de matrizes.
+    """
+    masks, vocab = get_country_index(df)
+    with_country = np.flatnonzero((masks != 0).any(axis=1))
+    rating = df['imdbAverageRating'].to_numpy(dtype=np.float64)[with_country]
+    votes = df['imdbNumVotes'].to_numpy(dtype=np.float64)[with_country]
+    values = np.column_stack([np.ones(len(with_country)), ~np.isnan(rating), np.nan_to_num(rating),
+                              ~np.isnan(votes), np.nan_to_num(votes)])
+
+    totals = np.zeros((len(vocab), values.shape[1]))
+    for start in range(0, len(with_country), chunk_rows):
+        words = np.ascontiguousarray(masks[with_country[start:start + chunk_rows]], dtype='<u8')
+        # Bit i de cada título na coluna i (little-endian, como as palavras uint64)
+        bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')[:, :len(vocab)]
+        totals += bits.T.astype(np.float64) @ values[start:start + chunk_rows]
+
+    titles, rated, rating_sum, voted, votes_sum = totals.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats = pd.DataFrame({
+            'País': vocab,
+            'Títulos': titles.astype(np.int64),
+            'Nota Média': np.where(rated > 0, rating_sum / rated, np.nan),
+            'Média de Votos': np.where(voted > 0, votes_sum / voted, np.nan),
+        })
+    stats = stats[stats['Títulos'] > 0]
+    return stats.sort_values('Títulos', ascending=False, kind='stable').reset_index(drop=True)
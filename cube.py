@@ -0,0 +1,582 @@
+# -*- coding: utf-8 -*-
+"""
+Cubo pré-agregado do catálogo para as métricas e gráficos do dashboard.
+
+Cada célula agrupa os títulos com o mesmo (type, releaseYear, faixa de nota,
+combinação de gêneros) e guarda contagens e somas (inclusive as de notas e
+votos, então médias, desvios e correlações continuam exatos). A nota entra por
+faixas de RATING_BUCKET: as faixas inteiramente dentro do intervalo de notas
+do filtro vêm do cubo e só os títulos das faixas parciais das bordas são lidos
+das linhas (query_cells), com o resultado idêntico à varredura das linhas.
+
+Sem filtro de gêneros, as métricas por título usam uma agregação sem a
+combinação de gêneros (rollup_cube) e os gráficos por gênero uma agregação por
+gênero (genre_rollup), bem menores que o cubo. O valor exato da nota só fica no
+cubo de postos (Spearman e distribuição das notas).
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from filtering import filter_positions, select_rows
+from genres import (GENRE_MASK_COLUMN, WORD_BITS, factorize_masks, genre_bits, genre_mask_columns,
+                    genre_mask_names, get_genre_index, match_genres)
+
+# Largura das faixas de nota; potência de 2, para que a faixa de cada nota
+# (floor(nota / largura)) e as comparações com os limites das faixas sejam exatas
+RATING_BUCKET = 0.5
+
+# Dimensões dos cubos; a combinação de gêneros entra pelas colunas de palavras
+# do índice (genre_mask e, com mais de 64 gêneros, genre_mask_1, ...)
+CUBE_DIMENSIONS = ['type', 'releaseYear', 'rating_bucket', GENRE_MASK_COLUMN]
+ROLLUP_DIMENSIONS = ['type', 'releaseYear', 'rating_bucket']
+RANK_DIMENSIONS = ['type', 'releaseYear', 'imdbAverageRating', GENRE_MASK_COLUMN, 'vote_bin']
+
+# Somas guardadas em cada célula. As colunas rv_* e os produtos cruzados só
+# contam as linhas com nota e votos, para os pares nota × votos da correlação
+SUM_COLUMNS = ['count', 'rating_count', 'rating_sum', 'rating_sq_sum', 'votes_count', 'votes_sum',
+               'votes_sq_sum', 'log_votes_sum', 'log_votes_sq_sum', 'votes_log_sum', 'rv_count',
+               'rv_rating_sum', 'rv_rating_sq_sum', 'rv_votes_sum', 'rv_votes_sq_sum', 'rv_log_votes_sum',
+               'rv_log_votes_sq_sum', 'rating_votes_sum', 'rating_log_votes_sum']
+
+# Variáveis da matriz de correlação; o ano é constante em cada célula
+CORR_COLUMNS = ['releaseYear', 'imdbAverageRating', 'imdbNumVotes', 'log_votes']
+CORR_PAIRS = list(combinations(CORR_COLUMNS, 2))
+RANK_COLUMNS = ['releaseYear', 'imdbAverageRating', 'imdbNumVotes']
+VOTE_BINS = 64
+
+# Somas de quadrados centradas abaixo desta fração de Σx² são ruído de
+# arredondamento (Σx² - (Σx)²/n perde precisão): a variância conta como zero
+VARIANCE_RTOL = 1e-12
+
+# Colunas lidas das linhas ao montar células (bordas do filtro de notas), além das do índice de gêneros
+CUBE_SOURCE_COLUMNS = ['type', 'releaseYear', 'imdbAverageRating', 'imdbNumVotes']
+
+
+def rating_bucket(ratings):
+    """Início da faixa de RATING_BUCKET de cada nota (NaN continua NaN)."""
+    return np.floor(np.asarray(ratings, dtype=np.float64) / RATING_BUCKET) * RATING_BUCKET
+
+
+def _mask_frame(masks):
+    """Colunas das palavras de máscara (genre_mask, genre_mask_1, ...) de um array linhas × palavras."""
+    return {column: masks[:, word] for word, column in enumerate(genre_mask_names(masks.shape[1]))}
+
+
+def _dimensions(dimensions, mask_columns):
+    """Dimensões de agrupamento com GENRE_MASK_COLUMN trocada pelas colunas de palavras."""
+    return [c for d in dimensions for c in (mask_columns if d == GENRE_MASK_COLUMN else [d])]
+
+
+def build_cube(df):
+    """Agrega o catálogo nas células do cubo."""
+    masks, vocab = get_genre_index(df)
+    mask_columns = _mask_frame(masks)
+    rating = df['imdbAverageRating'].to_numpy(dtype=np.float64)
+    votes = df['imdbNumVotes'].to_numpy(dtype=np.float64)
+    log_votes = np.log1p(votes)
+    both = ~(np.isnan(rating) | np.isnan(votes))
+    rv_rating, rv_votes, rv_log = (np.where(both, x, 0.0) for x in (rating, votes, log_votes))
+    has_rating, has_votes = ~np.isnan(rating), ~np.isnan(votes)
+    # Uma coluna por soma de SUM_COLUMNS, já com o nome final: o cubo sai de um único groupby().sum()
+    base = pd.DataFrame({
+        'type': df['type'].to_numpy(),
+        'releaseYear': df['releaseYear'].to_numpy(),
+        'rating_bucket': rating_bucket(rating),
+        **mask_columns,
+        'count': np.ones(len(rating)),
+        'rating_count': has_rating.astype(np.float64),
+        'rating_sum': rating,
+        'rating_sq_sum': rating ** 2,
+        'votes_count': has_votes.astype(np.float64),
+        'votes_sum': votes,
+        'votes_sq_sum': votes ** 2,
+        'log_votes_sum': log_votes,
+        'log_votes_sq_sum': log_votes ** 2,
+        'votes_log_sum': votes * log_votes,
+        'rv_count': both.astype(np.float64),
+        'rv_rating_sum': rv_rating,
+        'rv_rating_sq_sum': rv_rating ** 2,
+        'rv_votes_sum': rv_votes,
+        'rv_votes_sq_sum': rv_votes ** 2,
+        'rv_log_votes_sum': rv_log,
+        'rv_log_votes_sq_sum': rv_log ** 2,
+        'rating_votes_sum': rv_rating * rv_votes,
+        'rating_log_votes_sum': rv_rating * rv_log,
+    })
+    # sum() ignora NaN, como o agg('sum') das versões anteriores
+    cube = base.groupby(_dimensions(CUBE_DIMENSIONS, list(mask_columns)), dropna=False, sort=False)[SUM_COLUMNS] \
+        .sum().reset_index()
+    cube['count'] = cube['count'].astype(np.int64)
+    cube.attrs['genre_vocab'] = vocab
+    return cube
+
+
+def rollup_cube(cells):
+    """Células somadas sem a combinação de gêneros (métricas por título sem filtro de gêneros)."""
+    rollup = cells.groupby(ROLLUP_DIMENSIONS, dropna=False, sort=False)[SUM_COLUMNS].sum().reset_index()
+    rollup.attrs['genre_vocab'] = cells.attrs['genre_vocab']
+    return rollup
+
+
+def genre_rollup(cells):
+    """
+    Células por gênero: cada célula é repetida para cada gênero da sua
+    combinação e somada por (tipo, ano, faixa de nota, gênero). A coluna de
+    máscara fica com um único bit, então as funções por gênero (_has_genre)
+    funcionam sem mudanças; os totais por título não valem nessa agregação.
+    """
+    cell_idx, genre_idx = np.nonzero(_has_genre(cells))
+    exploded = cells.iloc[cell_idx, cells.columns.get_indexer(ROLLUP_DIMENSIONS + SUM_COLUMNS)]
+    single = np.zeros((len(genre_idx), len(genre_mask_columns(cells))), dtype=np.uint64)
+    single[np.arange(len(genre_idx)), genre_idx // WORD_BITS] = \
+        np.left_shift(np.uint64(1), (genre_idx % WORD_BITS).astype(np.uint64))
+    mask_columns = _mask_frame(single)
+    rollup = exploded.assign(**mask_columns) \
+        .groupby(_dimensions(CUBE_DIMENSIONS, list(mask_columns)), dropna=False, sort=False)[SUM_COLUMNS] \
+        .sum().reset_index()
+    rollup.attrs['genre_vocab'] = cells.attrs['genre_vocab']
+    return rollup
+
+
+def build_cube_lattice(df):
+    """Cubo por combinação de gêneros e suas duas agregações ('cube', 'titles', 'genres')."""
+    cube = build_cube(df)
+    return {'cube': cube, 'titles': rollup_cube(cube), 'genres': genre_rollup(cube)}
+
+
+def build_rank_cube(df, bins=VOTE_BINS):
+    """
+    Cubo de contagens por (tipo, ano, nota exata, gêneros, faixa de votos).
+
+    As faixas são quantis dos votos do catálogo inteiro (-1 = sem votos). Serve
+    à correlação de Spearman e à distribuição das notas por gênero: ano e nota
+    entram pelo valor exato, votos pela faixa. Fatiado com slice_cube.
+    """
+    masks, vocab = get_genre_index(df)
+    votes = df['imdbNumVotes'].to_numpy(dtype=np.float64)
+    edges = np.unique(np.nanquantile(votes, np.linspace(0, 1, bins + 1)[1:-1])) if np.isfinite(votes).any() \
+        else np.array([])
+    vote_bin = np.where(np.isnan(votes), -1, np.searchsorted(edges, votes, side='right')).astype(np.int16)
+
+    mask_columns = _mask_frame(masks)
+    base = pd.DataFrame({
+        'type': df['type'].to_numpy(),
+        'releaseYear': df['releaseYear'].to_numpy(),
+        'imdbAverageRating': df['imdbAverageRating'].to_numpy(dtype=np.float64),
+        **mask_columns,
+        'vote_bin': vote_bin,
+    })
+    cube = base.groupby(_dimensions(RANK_DIMENSIONS, list(mask_columns)), dropna=False, sort=False).size() \
+        .rename('count').reset_index()
+    cube.attrs['genre_vocab'] = vocab
+    return cube
+
+
+def covered_buckets(rating_range):
+    """
+    Intervalo [início, fim) de notas coberto por faixas inteiras dentro de
+    rating_range (inclusivo), ou None se nenhuma faixa cabe inteira.
+    """
+    low, high = rating_range
+    start = np.ceil(low / RATING_BUCKET) * RATING_BUCKET
+    end = np.floor(high / RATING_BUCKET) * RATING_BUCKET
+    return (start, end) if start < end else None
+
+
+def _edge_ranges(rating_range):
+    """Intervalos inclusivos de notas do filtro fora das faixas inteiras (lidos das linhas)."""
+    low, high = rating_range
+    covered = covered_buckets(rating_range)
+    if covered is None:
+        return [(low, high)]
+    start, end = covered
+    edges = [(low, np.nextafter(start, -np.inf))] if low < start else []
+    return edges + [(end, high)]
+
+
+def slice_cube(cube, years=None, rating_range=None, title_type=None, genres=None, genre_mode='any'):
+    """
+    Seleciona as células que atendem aos filtros (mesma semântica do app).
+
+    No cubo de postos a nota é exata. Nos cubos por faixa, só as faixas
+    inteiramente dentro de rating_range entram; as bordas vêm de query_cells.
+    """
+    keep = np.ones(len(cube), dtype=bool)
+    if years is not None:
+        keep &= cube['releaseYear'].between(*years).to_numpy()
+    if rating_range is not None and 'rating_bucket' in cube.columns:
+        covered = covered_buckets(rating_range)
+        buckets = cube['rating_bucket'].to_numpy()
+        keep &= (buckets >= covered[0]) & (buckets < covered[1]) if covered else False
+    elif rating_range is not None:
+        keep &= cube['imdbAverageRating'].between(*rating_range).to_numpy()
+    if title_type is not None and title_type != 'Todos':
+        keep &= (cube['type'] == title_type).to_numpy()
+    if genres:
+        masks, vocab = get_genre_index(cube)
+        keep &= match_genres(masks, vocab, genres, genre_mode)
+    return cube[keep]
+
+
+def _concat_cells(parts, vocab):
+    cells = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    cells.attrs['genre_vocab'] = vocab
+    return cells
+
+
+def query_cells(lattice, df, index, filters):
+    """
+    Células de um filtro (dicionário no formato de filtering) com resultado exato.
+
+    As faixas de nota inteiras vêm do cubo; os títulos das faixas parciais
+    (no máximo duas) são selecionados pelo planejador de filtering e agregados
+    na hora. Retorna {'cube', 'titles', 'genres'}: sem filtro de gêneros,
+    'titles' e 'genres' são as agregações menores; com filtro, as três são
+    as células por combinação de gêneros.
+    """
+    cube = lattice['cube']
+    vocab = cube.attrs['genre_vocab']
+    rating_range = filters.get('rating_range')
+    title_type = filters.get('type')
+    genres, genre_mode = filters.get('genres'), filters.get('genre_mode', 'any')
+
+    # Títulos das faixas parciais (as duas bordas) agregados em um único cubo
+    edge_positions = [filter_positions(df, {**filters, 'rating_range': edge}, index)[0]
+                      for edge in (_edge_ranges(rating_range) if rating_range is not None else [])]
+    edge_positions = np.concatenate(edge_positions) if edge_positions else np.array([], dtype=np.intp)
+    columns = CUBE_SOURCE_COLUMNS + genre_mask_columns(df)
+    edge = build_cube(select_rows(df, edge_positions, columns)) if len(edge_positions) else None
+
+    def level(name, from_cube):
+        cells = slice_cube(lattice[name], filters.get('years'), rating_range, title_type, genres, genre_mode)
+        return _concat_cells([cells, from_cube(edge)], vocab) if edge is not None else cells
+
+    cells = level('cube', lambda edge: edge)
+    if genres:
+        return {'cube': cells, 'titles': cells, 'genres': cells}
+    return {'cube': cells, 'titles': level('titles', rollup_cube), 'genres': level('genres', genre_rollup)}
+
+
+def cells_from_rows(rows):
+    """Mesmo formato de query_cells a partir de linhas já filtradas (ex.: filtro de países)."""
+    cube = build_cube(rows)
+    return {'cube': cube, 'titles': rollup_cube(cube), 'genres': genre_rollup(cube)}
+
+
+def cube_metrics(cells):
+    """Totais, médias e desvio padrão (ddof=1) a partir das somas das células."""
+    total = int(cells['count'].sum())
+    rating_n = cells['rating_count'].sum()
+    rating_sum = cells['rating_sum'].sum()
+    votes_n = cells['votes_count'].sum()
+    votes_sum = cells['votes_sum'].sum()
+
+    rating_std = np.nan
+    if rating_n > 1:
+        squares = cells['rating_sq_sum'].sum()
+        centered = squares - rating_sum ** 2 / rating_n
+        variance = centered / (rating_n - 1) if centered > VARIANCE_RTOL * squares else 0.0
+        rating_std = float(np.sqrt(variance))
+
+    return {
+        'total': total,
+        'avg_rating': rating_sum / rating_n if rating_n else np.nan,
+        'total_votes': votes_sum,
+        'avg_votes': votes_sum / votes_n if votes_n else np.nan,
+        'rating_std': rating_std,
+    }
+
+
+def _pair_sums(cells):
+    """
+    Estatísticas suficientes de cada par de CORR_PAIRS por célula: array
+    células × pares × (n, Σa, Σb, Σa², Σb², Σab), só com as linhas em que as
+    duas variáveis existem (como o .corr() do pandas). Somam entre células.
+    """
+    column = lambda name: cells[name].to_numpy(dtype=np.float64)
+    year = column('releaseYear')
+    year_valid = ~np.isnan(year)
+    year = np.nan_to_num(year)
+    # (n, Σx, Σx²) de cada variável nas linhas em que ela existe
+    own = {
+        'imdbAverageRating': (column('rating_count'), column('rating_sum'), column('rating_sq_sum')),
+        'imdbNumVotes': (column('votes_count'), column('votes_sum'), column('votes_sq_sum')),
+        'log_votes': (column('votes_count'), column('log_votes_sum'), column('log_votes_sq_sum')),
+    }
+    # As mesmas somas restritas às linhas com nota e votos, e os produtos cruzados
+    rv = {
+        'imdbAverageRating': (column('rv_rating_sum'), column('rv_rating_sq_sum')),
+        'imdbNumVotes': (column('rv_votes_sum'), column('rv_votes_sq_sum')),
+        'log_votes': (column('rv_log_votes_sum'), column('rv_log_votes_sq_sum')),
+    }
+    cross = {
+        ('imdbAverageRating', 'imdbNumVotes'): column('rating_votes_sum'),
+        ('imdbAverageRating', 'log_votes'): column('rating_log_votes_sum'),
+        ('imdbNumVotes', 'log_votes'): column('votes_log_sum'),
+    }
+
+    sums = np.empty((len(cells), len(CORR_PAIRS), 6))
+    for k, (a, b) in enumerate(CORR_PAIRS):
+        if a == 'releaseYear':
+            # Ano constante na célula: o produto cruzado é o ano vezes a soma de b
+            n, total, squares = (np.where(year_valid, v, 0.0) for v in own[b])
+            sums[:, k] = np.column_stack([n, year * n, total, year * year * n, squares, year * total])
+        elif a == 'imdbAverageRating':
+            n = column('rv_count')
+            (total_a, squares_a), (total_b, squares_b) = rv[a], rv[b]
+            sums[:, k] = np.column_stack([n, total_a, total_b, squares_a, squares_b, cross[a, b]])
+        else:
+            # Votos × log dos votos: os dois existem nas mesmas linhas
+            (n, total_a, squares_a), (_, total_b, squares_b) = own[a], own[b]
+            sums[:, k] = np.column_stack([n, total_a, total_b, squares_a, squares_b, cross[a, b]])
+    return sums
+
+
+def _pearson(sums):
+    """Correlação de Pearson a partir de (n, Σa, Σb, Σa², Σb², Σab) no último eixo."""
+    n, sa, sb, saa, sbb, sab = np.moveaxis(sums, -1, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sab - sa * sb / n
+        var_a = saa - sa ** 2 / n
+        var_b = sbb - sb ** 2 / n
+        r = cov / np.sqrt(var_a * var_b)
+    varies = (var_a > VARIANCE_RTOL * np.abs(saa)) & (var_b > VARIANCE_RTOL * np.abs(sbb))
+    return np.where((n > 1) & varies, np.clip(r, -1.0, 1.0), np.nan)
+
+
+def _self_correlation(n, total, squares):
+    """Diagonal da matriz: 1 para colunas que variam, NaN para constantes (como o pandas)."""
+    return _pearson(np.stack([n, total, total, squares, squares, squares], axis=-1))
+
+
+def _square(columns, pairs, values, diagonal):
+    matrix = pd.DataFrame(np.diag(np.asarray(diagonal, dtype=np.float64)), index=columns, columns=columns)
+    for (a, b), value in zip(pairs, values):
+        matrix.loc[a, b] = matrix.loc[b, a] = value
+    return matrix
+
+
+def _column_sums(cells):
+    """(n, Σx, Σx²) de cada coluna de CORR_COLUMNS, só com as linhas em que ela existe."""
+    year = cells['releaseYear'].to_numpy(dtype=np.float64)
+    n = np.where(np.isnan(year), 0.0, cells['count'].to_numpy(dtype=np.float64))
+    year = np.nan_to_num(year)
+    votes_n = cells['votes_count'].sum()
+    return np.array([
+        (n.sum(), year @ n, (year * year) @ n),
+        (cells['rating_count'].sum(), cells['rating_sum'].sum(), cells['rating_sq_sum'].sum()),
+        (votes_n, cells['votes_sum'].sum(), cells['votes_sq_sum'].sum()),
+        (votes_n, cells['log_votes_sum'].sum(), cells['log_votes_sq_sum'].sum()),
+    ], dtype=np.float64)
+
+
+def cube_correlation(cells):
+    """Matriz de Pearson (ano, nota, votos e log dos votos) somando as estatísticas das células."""
+    diagonal = _self_correlation(*_column_sums(cells).T)
+    return _square(CORR_COLUMNS, CORR_PAIRS, _pearson(_pair_sums(cells).sum(axis=0)), diagonal)
+
+
+def _midranks(values, weights):
+    """Postos médios (empates com o posto médio) de valores com pesos inteiros."""
+    uniques, inverse = np.unique(values, return_inverse=True)
+    totals = np.bincount(inverse, weights=weights, minlength=len(uniques))
+    return (np.cumsum(totals) - (totals - 1) / 2)[inverse]
+
+
+def cube_spearman(rank_cells):
+    """
+    Matriz de Spearman a partir das células do cubo de postos.
+
+    Exata entre ano e nota; com votos, os empates são as faixas de votos do
+    cubo (postos agrupados por faixa).
+    """
+    weights = rank_cells['count'].to_numpy(dtype=np.float64)
+    values = {name: rank_cells[name].to_numpy(dtype=np.float64) for name in RANK_COLUMNS[:2]}
+    vote_bin = rank_cells['vote_bin'].to_numpy(dtype=np.float64)
+    values['imdbNumVotes'] = np.where(vote_bin < 0, np.nan, vote_bin)
+
+    pairs = list(combinations(RANK_COLUMNS, 2))
+    result = []
+    for a, b in pairs:
+        valid = ~(np.isnan(values[a]) | np.isnan(values[b]))
+        w = weights[valid]
+        x, y = _midranks(values[a][valid], w), _midranks(values[b][valid], w)
+        result.append(_pearson(np.array([w.sum(), w @ x, w @ y, w @ (x * x), w @ (y * y), w @ (x * y)])))
+
+    diagonal = []
+    for name in RANK_COLUMNS:
+        valid = ~np.isnan(values[name])
+        w = weights[valid]
+        x = _midranks(values[name][valid], w)
+        diagonal.append(_self_correlation(w.sum(), w @ x, w @ (x * x)))
+    return _square(RANK_COLUMNS, pairs, result, diagonal)
+
+
+def _has_genre(cells):
+    """Matriz booleana células × gêneros a partir das máscaras."""
+    masks, vocab = get_genre_index(cells)
+    return genre_bits(masks, len(vocab))
+
+
+def cube_genre_counts(cells, top=None):
+    """Títulos por gênero: soma das contagens das células que têm o bit do gênero."""
+    vocab = cells.attrs['genre_vocab']
+    counts = _has_genre(cells).T.astype(np.int64) @ cells['count'].to_numpy(dtype=np.int64)
+
+    genre_counts = pd.DataFrame({'Gênero': vocab, 'Contagem': counts})
+    genre_counts = genre_counts[genre_counts['Contagem'] > 0]
+    genre_counts = genre_counts.sort_values('Contagem', ascending=False, kind='stable')
+    return genre_counts.head(top) if top else genre_counts
+
+
+def cube_genre_ratings(cells):
+    """
+    Distribuição exata das notas por gênero: DataFrame gêneros × notas com a
+    quantidade de títulos em cada par, a partir das células do cubo de postos
+    (nota exata).
+
+    Equivale a explodir cada título nos seus gêneros e contar (gênero, nota),
+    mas percorre só os pares (célula, gênero). Títulos sem nota ficam de fora.
+    """
+    vocab = cells.attrs['genre_vocab']
+    rated = cells[cells['imdbAverageRating'].notna()]
+    rated.attrs['genre_vocab'] = vocab
+    rating_codes, ratings = pd.factorize(rated['imdbAverageRating'].to_numpy(dtype=np.float64), sort=True)
+
+    cell_idx, genre_idx = np.nonzero(_has_genre(rated))
+    weights = rated['count'].to_numpy(dtype=np.float64)[cell_idx]
+    counts = np.bincount(genre_idx * len(ratings) + rating_codes[cell_idx], weights=weights,
+                         minlength=len(vocab) * len(ratings))
+    return pd.DataFrame(counts.reshape(len(vocab), len(ratings)).astype(np.int64), index=vocab, columns=ratings)
+
+
+def quantiles_from_counts(values, counts, quantiles):
+    """Quantis com interpolação linear (a regra padrão do numpy) a partir de valor -> contagem."""
+    cumulative = np.cumsum(counts)
+    positions = np.asarray(quantiles, dtype=np.float64) * (cumulative[-1] - 1)
+    lower = np.floor(positions)
+    # i-ésimo valor da amostra ordenada: primeiro valor cuja contagem acumulada passa de i
+    low_values = values[np.searchsorted(cumulative, lower, side='right')]
+    high_values = values[np.searchsorted(cumulative, np.minimum(lower + 1, cumulative[-1] - 1), side='right')]
+    return low_values + (positions - lower) * (high_values - low_values)
+
+
+def rating_distribution(genre_ratings, genre, bins=30):
+    """
+    Histograma e resumo de cinco números das notas de um gênero.
+
+    Os bins são iguais para todos os gêneros (faixa de notas do recorte). As
+    cercas do box plot seguem Tukey: o valor observado mais extremo dentro de
+    1,5 × IQR a partir dos quartis. Retorna None se o gênero não tem notas.
+    """
+    values = genre_ratings.columns.to_numpy(dtype=np.float64)
+    counts = genre_ratings.loc[genre].to_numpy()
+    present = counts > 0
+    if not present.any():
+        return None
+
+    edges = np.linspace(values.min(), values.max(), bins + 1) if len(values) > 1 else \
+        np.array([values[0] - 0.05, values[0] + 0.05])
+    hist, _ = np.histogram(values, bins=edges, weights=counts)
+
+    values, counts = values[present], counts[present]
+    q1, median, q3 = quantiles_from_counts(values, counts, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    return {
+        'n': int(counts.sum()),
+        'edges': edges,
+        'counts': hist.astype(np.int64),
+        'min': values[0],
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'max': values[-1],
+        'mean': float(np.dot(values, counts) / counts.sum()),
+        'lowerfence': values[values >= q1 - 1.5 * iqr][0],
+        'upperfence': values[values <= q3 + 1.5 * iqr][-1],
+    }
+
+
+def cube_genre_correlations(cells, pairs=None, min_titles=3):
+    """
+    Correlações de Pearson por gênero em uma passada: as estatísticas dos pares
+    de todas as células são somadas por gênero com um produto de matrizes.
+    Colunas 'a × b' por par e 'Títulos'; gêneros com menos de min_titles ficam de fora.
+    """
+    vocab = cells.attrs['genre_vocab']
+    pairs = pairs or CORR_PAIRS
+    selected = [CORR_PAIRS.index(pair) for pair in pairs]
+    sums = _pair_sums(cells)[:, selected]
+    by_genre = (_has_genre(cells).T.astype(np.float64) @ sums.reshape(len(cells), -1)).reshape(len(vocab), len(pairs), 6)
+
+    table = pd.DataFrame(_pearson(by_genre), index=pd.Index(vocab, name='Gênero'),
+                         columns=[f"{a} × {b}" for a, b in pairs])
+    table.insert(0, 'Títulos', _has_genre(cells).T.astype(np.int64) @ cells['count'].to_numpy(dtype=np.int64))
+    return table[table['Títulos'] >= min_titles].sort_values('Títulos', ascending=False, kind='stable')
+
+
+def cooccurrence_from_masks(masks, vocab, count, rating_count, rating_sum):
+    """
+    Co-ocorrência dos pares de gêneros: títulos, nota média e lift de cada par.
+
+    As entradas (linhas ou células do cubo) são agrupadas pela combinação de
+    gêneros antes do produto, então a matriz multi-hot combinações × gêneros é
+    pequena mesmo com milhões de títulos. Lift = P(a e b) / (P(a) P(b)).
+    """
+    codes, combos = factorize_masks(np.asarray(masks, dtype=np.uint64))
+    weights = np.column_stack([np.bincount(codes, weights=np.asarray(w, dtype=np.float64), minlength=len(combos))
+                               for w in (count, rating_count, rating_sum)])
+    multi_hot = genre_bits(combos, len(vocab)).astype(np.float64)
+    pair_titles, pair_rated, pair_rating = (multi_hot.T @ (multi_hot * weights[:, [k]]) for k in range(3))
+
+    total = weights[:, 0].sum()
+    single = np.diag(pair_titles)
+    a, b = np.triu_indices(len(vocab), k=1)
+    keep = pair_titles[a, b] > 0
+    a, b = a[keep], b[keep]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pairs = pd.DataFrame({
+            'Gênero A': np.asarray(vocab, dtype=object)[a],
+            'Gênero B': np.asarray(vocab, dtype=object)[b],
+            'Títulos': pair_titles[a, b].astype(np.int64),
+            'Nota Média': np.where(pair_rated[a, b] > 0, pair_rating[a, b] / pair_rated[a, b], np.nan),
+            'Lift': pair_titles[a, b] * total / (single[a] * single[b]),
+        })
+    return pairs.sort_values('Títulos', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def cube_genre_cooccurrence(cells):
+    """Co-ocorrência de gêneros somando as células do cubo (ver cooccurrence_from_masks)."""
+    masks, vocab = get_genre_index(cells)
+    return cooccurrence_from_masks(masks, vocab, cells['count'],
+                                   cells['rating_count'], cells['rating_sum'])
+
+
+def genre_cooccurrence(df):
+    """Co-ocorrência de gêneros direto das linhas de um recorte."""
+    masks, vocab = get_genre_index(df)
+    rating = df['imdbAverageRating'].to_numpy(dtype=np.float64)
+    return cooccurrence_from_masks(masks, vocab, np.ones(len(df)), ~np.isnan(rating), np.nan_to_num(rating))
+
+
+def cooccurrence_matrix(pairs, value='Títulos', genres=None):
+    """Matriz simétrica gêneros × gêneros de uma coluna da tabela de pares (sem diagonal)."""
+    genres = genres if genres is not None else sorted(set(pairs['Gênero A']) | set(pairs['Gênero B']))
+    pairs = pairs[pairs['Gênero A'].isin(genres) & pairs['Gênero B'].isin(genres)]
+    position = pd.Index(genres)
+    rows, cols = position.get_indexer(pairs['Gênero A']), position.get_indexer(pairs['Gênero B'])
+    values = np.full((len(genres), len(genres)), np.nan)
+    values[rows, cols] = values[cols, rows] = pairs[value].to_numpy(dtype=np.float64)
+    return pd.DataFrame(values, index=genres, columns=genres)
+
+
+def cube_by_year(cells):
+    """Quantidade de títulos e nota média por ano."""
+    by_year = cells.groupby('releaseYear')[['count', 'rating_count', 'rating_sum']].sum()
+    return pd.DataFrame({
+        'releaseYear': by_year.index,
+        'count': by_year['count'].to_numpy(),
+        'imdbAverageRating': (by_year['rating_sum'] / by_year['rating_count']).to_numpy(),
+    })
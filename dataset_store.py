@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Artefato colunar do catálogo processado.
+
+Cada coluna é gravada como um .npy tipado dentro de um diretório ao lado do CSV
+(ex.: data/processed/data_tratada.columns/), com um meta.json descrevendo o
+esquema, as categorias das colunas de texto e a assinatura do CSV de origem.
+Os arrays são abertos com memory-map, então a carga não reinterpreta texto nem
+reinfere tipos.
+
+Cada gravação cria uma versão nova (subdiretório v<timestamp>) e troca o
+arquivo CURRENT de forma atômica. Vários processos que abrem a mesma versão
+compartilham as páginas dos arquivos mapeados (somente leitura); quem já abriu
+uma versão anterior continua com ela até recarregar.
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from genres import GENRE_MASK_COLUMN
+
+FORMAT_VERSION = 2
+ARTIFACT_SUFFIX = '.columns'
+META_FILE = 'meta.json'
+CURRENT_FILE = 'CURRENT'
+
+# Versões mantidas no disco: a atual e a anterior, ainda aberta por processos
+# que não recarregaram
+KEEP_VERSIONS = 2
+
+REQUIRED_COLS = {'title', 'type', 'genres', 'releaseYear', 'imdbAverageRating', 'imdbNumVotes'}
+
+# Tipos compactos para as colunas numéricas conhecidas. imdbAverageRating fica
+# em float64: em float32 os limites do slider (passo 0.1) deixariam de comparar
+# exatamente, e a coluna teria de ser convertida (copiada) em cada processo.
+# Colunas declaradas inteiras só são convertidas se já forem inteiras: nenhum
+# valor é arredondado no caminho (votos fracionários são um erro do dado)
+NUMERIC_DTYPES = {
+    'releaseYear': np.int16,
+    'imdbAverageRating': np.float64,
+    'imdbNumVotes': np.int32,
+}
+
+# Colunas inteiras com nulos são gravadas em float32; na carga são promovidas e
+# arredondadas nesta precisão
+_FLOAT32_LOAD_DECIMALS = 5
+
+
+def artifact_path(csv_path):
+    """Diretório do artefato colunar correspondente a um CSV processado."""
+    return os.path.splitext(csv_path)[0] + ARTIFACT_SUFFIX
+
+
+def current_version(csv_path):
+    """Versão apontada por CURRENT, ou None se não houver artefato."""
+    try:
+        with open(os.path.join(artifact_path(csv_path), CURRENT_FILE), encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version if os.path.isdir(os.path.join(artifact_path(csv_path), version)) else None
+
+
+def _code_dtype(n_categories):
+    """Menor inteiro para os códigos, o mesmo que o pandas usa em Categorical."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _source_signature(csv_path):
+    """Tamanho e mtime do CSV de origem, usados para detectar artefatos obsoletos."""
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _encode_column(series):
+    """Converte uma coluna em (array, descrição) para gravação."""
+    name = series.name
+    if name == GENRE_MASK_COLUMN:
+        return series.to_numpy(dtype=np.uint64), {'kind': 'numeric'}
+
+    if name in NUMERIC_DTYPES:
+        dtype = np.dtype(NUMERIC_DTYPES[name])
+        values = series.to_numpy(dtype=np.float64)
+        if dtype.kind == 'i':
+            # Inteiros não representam nulos: a coluna fica em float32 nesse caso
+            if np.isnan(values).any():
+                return values.astype(np.float32), {'kind': 'numeric'}
+            # Converter arredondaria em silêncio (e mudaria somas como os votos totais)
+            if not _whole(values):
+                fractional = int(np.count_nonzero(values != np.rint(values)))
+                raise ValueError(f"Coluna {name} tem {fractional:,} valores não inteiros e não pode ser "
+                                 f"gravada como {dtype}; reprocesse o CSV (movies_dataset.py)")
+            if not _fits(values, dtype):
+                raise ValueError(f"Coluna {name} tem valores fora do intervalo de {dtype}")
+        return values.astype(dtype), {'kind': 'numeric'}
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(), {'kind': 'numeric'}
+
+    # Texto e categorias: códigos (-1 = nulo) + lista ordenada de categorias no
+    # meta; categorias ordenadas mantêm sort_values em ordem alfabética
+    codes, categories = pd.factorize(series, sort=True, use_na_sentinel=True)
+    return (codes.astype(_code_dtype(len(categories))),
+            {'kind': 'categorical', 'categories': [str(c) for c in categories]})
+
+
+def save_columnar(df, csv_path):
+    """
+    Grava o artefato colunar de df ao lado de csv_path.
+
+    A versão nova é montada em uma pasta temporária, renomeada e só então
+    publicada em CURRENT, então leitores nunca veem um artefato pela metade.
+    Retorna o diretório da versão.
+    """
+    target = artifact_path(csv_path)
+    if os.path.exists(os.path.join(target, META_FILE)):
+        # Layout da versão 1, sem subdiretórios de versão
+        shutil.rmtree(target)
+    version = f"v{time.time_ns()}"
+    tmp_dir = os.path.join(target, version + '.tmp')
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for position, name in enumerate(df.columns):
+        values, info = _encode_column(df[name])
+        file_name = f"{position:03d}.npy"
+        np.save(os.path.join(tmp_dir, file_name), values)
+        columns.append({'name': name, 'file': file_name, 'dtype': values.dtype.str, **info})
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': len(df),
+        'columns': columns,
+        'genre_vocab': df.attrs.get('genre_vocab'),
+        'country_vocab': df.attrs.get('country_vocab'),
+        'source': _source_signature(csv_path),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    os.replace(tmp_dir, os.path.join(target, version))
+    current_tmp = os.path.join(target, CURRENT_FILE + '.tmp')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(target, CURRENT_FILE))
+    _prune_versions(target, version)
+    return os.path.join(target, version)
+
+
+def _prune_versions(target, current):
+    """Remove versões antigas, mantendo as KEEP_VERSIONS mais recentes."""
+    versions = sorted(name for name in os.listdir(target)
+                      if name.startswith('v') and not name.endswith('.tmp') and name != current)
+    for name in versions[:max(len(versions) - (KEEP_VERSIONS - 1), 0)]:
+        # Processos que ainda mapeiam os arquivos mantêm o acesso (POSIX); no
+        # Windows arquivos abertos não podem ser removidos e ficam para a próxima vez
+        shutil.rmtree(os.path.join(target, name), ignore_errors=True)
+
+
+def _read_meta(directory):
+    meta_path = os.path.join(directory, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_artifact_fresh(csv_path, version=None):
+    """True se o artefato existe, tem o formato atual e corresponde ao CSV de origem."""
+    version = version or current_version(csv_path)
+    if version is None:
+        return False
+    meta = _read_meta(os.path.join(artifact_path(csv_path), version))
+    if meta is None or meta.get('version') != FORMAT_VERSION:
+        return False
+    signature = _source_signature(csv_path)
+    # Sem o CSV não há como ficar obsoleto: o artefato é a única cópia
+    return signature is None or signature == meta.get('source')
+
+
+def load_columnar(csv_path, mmap=True, categorical=False, version=None):
+    """
+    Carrega o artefato colunar de csv_path (a versão atual, ou version).
+
+    Com categorical=True as colunas de texto viram Categorical sobre os códigos
+    mapeados: com mmap, nenhuma coluna é copiada para a memória do processo
+    (só as listas de categorias) e o DataFrame é somente leitura.
+    Retorna None se o artefato não existe, está obsoleto ou não segue o esquema.
+    """
+    version = version or current_version(csv_path)
+    if not is_artifact_fresh(csv_path, version):
+        return None
+    directory = os.path.join(artifact_path(csv_path), version)
+    meta = _read_meta(directory)
+
+    names = [c['name'] for c in meta['columns']]
+    if not REQUIRED_COLS.issubset(names):
+        return None
+
+    data = {}
+    for column in meta['columns']:
+        values = np.load(os.path.join(directory, column['file']), mmap_mode='r' if mmap else None)
+        if len(values) != meta['rows']:
+            return None
+
+        if column['kind'] == 'categorical' and categorical:
+            data[column['name']] = pd.Categorical.from_codes(values, categories=column['categories'],
+                                                             validate=False)
+        elif column['kind'] == 'categorical':
+            categories = np.asarray(column['categories'] + [np.nan], dtype=object)
+            # O código -1 indexa a última posição, reservada para nulos
+            data[column['name']] = categories[values]
+        elif values.dtype == np.float32:
+            data[column['name']] = np.round(values.astype(np.float64), _FLOAT32_LOAD_DECIMALS)
+        else:
+            data[column['name']] = values
+
+    df = pd.DataFrame(data, columns=names, copy=False)
+    if meta.get('genre_vocab') is not None:
+        df.attrs['genre_vocab'] = meta['genre_vocab']
+    if meta.get('country_vocab') is not None:
+        df.attrs['country_vocab'] = meta['country_vocab']
+    df.attrs['dataset_version'] = version
+    return df
+
+
+# --- LAYOUT COMPACTO EM MEMÓRIA ---
+# Cada processo do app guarda a sua cópia do catálogo; colunas de texto com
+# poucos valores distintos viram category (códigos inteiros + tabela de
+# categorias) e os números conhecidos usam os mesmos tipos do artefato colunar.
+
+# Fração máxima de valores distintos para uma coluna de texto virar category
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _whole(values):
+    return bool(np.all(values == np.rint(values)))
+
+
+def _fits(values, dtype):
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_frame(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Cópia rasa de df com tipos compactos, mesmos valores e mesmos attrs.
+
+    A coluna genres vira category, e o conjunto de gêneros de cada linha já
+    está como inteiro na máscara de genres.index_genres. Colunas inteiras só
+    diminuem de tipo quando todos os valores são inteiros e cabem nele; com
+    nulos ou frações a coluna fica como está (nada é arredondado).
+    """
+    compact = df.copy(deep=False)
+    for name in df.columns:
+        series = df[name]
+        if name in NUMERIC_DTYPES:
+            dtype = np.dtype(NUMERIC_DTYPES[name])
+            if series.dtype == dtype or dtype.kind != 'i' or series.isna().any():
+                continue
+            values = series.to_numpy(dtype=np.float64)
+            if _whole(values) and _fits(values, dtype):
+                compact[name] = values.astype(dtype)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if series.nunique() <= category_max_ratio * len(series):
+                compact[name] = series.astype('category')
+    return compact
+
+
+def memory_report(before, after):
+    """Memória por coluna (bytes, contando o conteúdo dos textos) antes e depois."""
+    report = pd.DataFrame({
+        'antes': before.memory_usage(deep=True, index=False),
+        'depois': after.memory_usage(deep=True, index=False),
+        'tipo': after.dtypes.astype(str),
+    })
+    report.loc['TOTAL'] = [report['antes'].sum(), report['depois'].sum(), '']
+    return report
+
+
+# --- MANIFESTO DO MODO INCREMENTAL ---
+# Uma chave e um hash por linha do CSV bruto, na mesma ordem das linhas do CSV
+# processado, mais a assinatura desse CSV: se ele for regravado por outro
+# caminho, o manifesto deixa de valer e a próxima atualização é completa.
+
+MANIFEST_SUFFIX = '.manifest.npz'
+KEY_COLUMN = 'imdbId'
+
+
+def manifest_path(csv_path):
+    """Arquivo do manifesto correspondente a um CSV processado."""
+    return os.path.splitext(csv_path)[0] + MANIFEST_SUFFIX
+
+
+def row_keys(raw_df):
+    """
+    Chave estável por linha: imdbId, ou título|tipo|ano quando o id falta.
+
+    Chaves repetidas recebem o número da ocorrência (#1, #2...), então cada
+    linha do CSV bruto tem uma chave única.
+    """
+    fallback = (raw_df['title'].fillna('').astype(str) + '|' + raw_df['type'].fillna('').astype(str)
+                + '|' + raw_df['releaseYear'].fillna('').astype(str))
+    keys = raw_df[KEY_COLUMN].astype(object).where(raw_df[KEY_COLUMN].notna(), fallback).astype(str)
+    occurrence = keys.groupby(keys, sort=False).cumcount()
+    return keys.where(occurrence == 0, keys + '#' + occurrence.astype(str)).to_numpy(dtype=str)
+
+
+def hash_rows(raw_df):
+    """Hash de 64 bits do conteúdo bruto de cada linha (todas as colunas, como texto)."""
+    return pd.util.hash_pandas_object(raw_df.astype(object), index=False).to_numpy(dtype=np.uint64)
+
+
+def save_manifest(csv_path, keys, hashes):
+    """Grava o manifesto de csv_path (chamar depois de gravar o CSV processado)."""
+    signature = _source_signature(csv_path)
+    tmp_path = manifest_path(csv_path) + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, keys=np.asarray(keys, dtype=str), hashes=np.asarray(hashes, dtype=np.uint64),
+                 version=FORMAT_VERSION, signature=json.dumps(signature))
+    os.replace(tmp_path, manifest_path(csv_path))
+
+
+def load_manifest(csv_path):
+    """
+    Retorna (chaves, hashes) do manifesto de csv_path.
+
+    None se o manifesto não existe, é de outra versão ou não corresponde mais
+    ao CSV processado.
+    """
+    path = manifest_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as manifest:
+        if int(manifest['version']) != FORMAT_VERSION:
+            return None
+        if json.loads(str(manifest['signature'])) != _source_signature(csv_path):
+            return None
+        return manifest['keys'], manifest['hashes']
+
+
+def load_dataset(csv_path):
+    """
+    Carrega o catálogo processado pelo artefato colunar, com fallback para o CSV.
+
+    Retorna (df, origem), onde origem é 'columnar' ou 'csv'.
+    """
+    df = load_columnar(csv_path)
+    source = 'columnar'
+    if df is None:
+        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        source = 'csv'
+
+    missing_cols = REQUIRED_COLS - set(df.columns)
+    if missing_cols:
+        raise ValueError(f"Colunas faltantes: {missing_cols}")
+    return df, source
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera o artefato colunar a partir de um CSV processado.")
+    parser.add_argument('csv_path', nargs='?', default='data/processed/data_tratada.csv')
+    args = parser.parse_args()
+
+    from countries import index_countries
+    from genres import index_genres
+
+    frame = pd.read_csv(args.csv_path, encoding='utf-8-sig')
+    path = save_columnar(index_countries(index_genres(frame)), args.csv_path)
+    print(f"Artefato colunar salvo em: {path} ({len(frame):,} registros)")
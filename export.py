@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação do recorte filtrado em blocos: CSV compactado (gzip), Parquet e JSON Lines.
+
+O recorte é serializado em blocos de linhas direto no arquivo de saída
+(compressor gzip ou row groups do Parquet), sem montar o texto do arquivo
+inteiro em memória. Parquet requer o pyarrow.
+"""
+import gzip
+import io
+
+EXPORT_CHUNK_ROWS = 50_000
+
+EXPORT_FORMATS = {
+    'csv.gz': {'label': 'CSV compactado (gzip)', 'mime': 'application/gzip'},
+    'parquet': {'label': 'Parquet', 'mime': 'application/vnd.apache.parquet'},
+    'jsonl': {'label': 'JSON Lines', 'mime': 'application/jsonl'},
+}
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def _write_csv_gz(df, f, chunk_rows):
+    with gzip.GzipFile(fileobj=f, mode='wb') as gz, io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+        for start, chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(text, index=False, header=(start == 0))
+
+
+def _write_jsonl(df, f, chunk_rows):
+    for _, chunk in _chunks(df, chunk_rows):
+        if len(chunk):
+            f.write(chunk.to_json(orient='records', lines=True, force_ascii=False).rstrip('\n').encode('utf-8'))
+            f.write(b'\n')
+
+
+def _write_parquet(df, f, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Para exportar em Parquet instale o pyarrow (pip install pyarrow)")
+
+    # Colunas category são gravadas pelos valores: o Parquet já codifica com
+    # dicionário por row group, só com os valores presentes no bloco
+    plain = {name: dtype.categories.dtype for name, dtype in df.dtypes.items() if dtype == 'category'}
+    schema = pa.Schema.from_pandas(df.iloc[:0].astype(plain), preserve_index=False)
+    with pq.ParquetWriter(f, schema, compression='snappy') as writer:
+        for _, chunk in _chunks(df, chunk_rows):
+            # Cada bloco vira um row group
+            writer.write_table(pa.Table.from_pandas(chunk.astype(plain), schema=schema, preserve_index=False))
+
+
+_WRITERS = {
+    'csv.gz': _write_csv_gz,
+    'parquet': _write_parquet,
+    'jsonl': _write_jsonl,
+}
+
+
+def available_formats():
+    """Formatos suportados no ambiente atual (Parquet só com pyarrow instalado)."""
+    import importlib.util
+
+    formats = list(EXPORT_FORMATS)
+    if importlib.util.find_spec('pyarrow') is None:
+        formats.remove('parquet')
+    return formats
+
+
+def write_export(df, fmt, f, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Grava df no arquivo binário f, no formato fmt, em blocos de chunk_rows linhas."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+    _WRITERS[fmt](df, f, chunk_rows)
+
+
+def export_bytes(df, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Conteúdo do arquivo exportado (já compactado) em bytes."""
+    buffer = io.BytesIO()
+    write_export(df, fmt, buffer, chunk_rows)
+    return buffer.getvalue()
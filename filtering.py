@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Avaliação dos filtros do catálogo sem cópias intermediárias.
+
+Cada predicado (anos, avaliação, tipo, gêneros, países) vira um array booleano
+sobre o DataFrame inteiro; as máscaras são combinadas com & e só a seleção
+final é materializada. As contagens por estágio do diagnóstico saem de popcounts da
+máscara acumulada.
+"""
+import numpy as np
+import pandas as pd
+
+from countries import get_country_index, match_countries
+from genres import get_genre_index, match_genres
+from instrumentation import is_enabled, measure
+
+FILTER_STAGES = ('years', 'rating_range', 'type', 'genres', 'countries')
+
+# Predicados avaliados pelos índices de bits, sempre depois dos ordenados
+BITSET_STAGES = ('genres', 'countries')
+
+
+def _is_active(stage, filters):
+    if stage == 'type':
+        return filters.get('type', 'Todos') != 'Todos'
+    if stage in BITSET_STAGES:
+        return bool(filters.get(stage))
+    return stage in filters
+
+
+def _predicate_mask(df, stage, filters):
+    if stage in RANGE_COLUMNS:
+        return df[RANGE_COLUMNS[stage]].between(*filters[stage]).to_numpy()
+    if stage == 'type':
+        return (df['type'] == filters['type']).to_numpy()
+    if stage == 'countries':
+        masks, vocab = get_country_index(df)
+        return match_countries(masks, vocab, filters['countries'], filters.get('country_mode', 'any'))
+    masks, vocab = get_genre_index(df)
+    return match_genres(masks, vocab, filters['genres'], filters.get('genre_mode', 'any'))
+
+
+def predicate_masks(df, filters):
+    """Lista de (estágio, máscara booleana) para cada filtro ativo em filters."""
+    stages = []
+    for stage in FILTER_STAGES:
+        if not _is_active(stage, filters):
+            continue
+        with measure(f"filter:{stage}", len(df)) as record:
+            stage_mask = _predicate_mask(df, stage, filters)
+            if is_enabled():
+                record['rows_out'] = int(np.count_nonzero(stage_mask))
+        stages.append((stage, stage_mask))
+    return stages
+
+
+def filter_mask(df, filters):
+    """
+    Máscara combinada de todos os filtros.
+
+    Retorna (máscara, contagens), onde contagens é uma lista de (estágio, linhas
+    restantes após o estágio), na ordem de FILTER_STAGES.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    counts = []
+    for stage, stage_mask in predicate_masks(df, filters):
+        mask &= stage_mask
+        counts.append((stage, int(np.count_nonzero(mask))))
+    return mask, counts
+
+
+def select_rows(df, selection, columns=None):
+    """
+    Materializa as linhas selecionadas (máscara booleana ou posições).
+
+    Com columns, só essas colunas são copiadas — útil para agregações que leem
+    poucas colunas de um DataFrame largo.
+    """
+    positions = np.flatnonzero(selection) if selection.dtype == bool else selection
+    if columns is None:
+        return df.take(positions)
+    return df.iloc[positions, df.columns.get_indexer(columns)]
+
+
+# --- ÍNDICES ORDENADOS E PLANEJADOR DE CONSULTA ---
+# Para catálogos grandes: permutações de ordenação (argsort) de releaseYear,
+# imdbAverageRating e do código de type resolvem cada predicado com dois
+# searchsorted, virando uma fatia contígua da permutação. O planejador começa
+# pelo predicado mais seletivo e avalia os demais só sobre os candidatos.
+
+RANGE_COLUMNS = {'years': 'releaseYear', 'rating_range': 'imdbAverageRating'}
+
+# Acima desta fração do catálogo a varredura com máscara é mais barata que
+# ordenar e percorrer os candidatos
+INDEX_MAX_FRACTION = 0.2
+
+
+def build_sorted_index(values):
+    """Permutação estável que ordena values e os valores já ordenados."""
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(values, kind='stable')
+    return order, values[order]
+
+
+def build_query_index(df):
+    """Índices ordenados das colunas filtráveis por intervalo/igualdade."""
+    type_codes, type_values = pd.factorize(df['type'])
+    index = {stage: build_sorted_index(df[column].to_numpy(dtype=np.float64))
+             for stage, column in RANGE_COLUMNS.items()}
+    index['type'] = build_sorted_index(type_codes)
+    index['type_values'] = list(type_values)
+    index['type_codes'] = type_codes
+    index['rows'] = len(df)
+    return index
+
+
+def _index_slice(index, stage, filters):
+    """Intervalo [início, fim) da permutação que satisfaz o predicado do estágio."""
+    _, sorted_values = index[stage]
+    if stage == 'type':
+        if filters['type'] not in index['type_values']:
+            return 0, 0
+        low = high = index['type_values'].index(filters['type'])
+    else:
+        low, high = filters[stage]
+    # Equivalente a Series.between (inclusivo); NaN fica no fim e nunca entra
+    return (int(np.searchsorted(sorted_values, low, side='left')),
+            int(np.searchsorted(sorted_values, high, side='right')))
+
+
+def plan_query(filters, index):
+    """
+    Ordem de avaliação dos predicados ativos.
+
+    Predicados com índice são ordenados pela quantidade exata de linhas que
+    selecionam (diferença entre os searchsorted); gêneros e países vêm por último.
+    Retorna lista de (estágio, linhas estimadas ou None).
+    """
+    estimates = []
+    for stage in FILTER_STAGES:
+        if stage in BITSET_STAGES or stage not in filters:
+            continue
+        if stage == 'type' and filters['type'] == 'Todos':
+            continue
+        start, end = _index_slice(index, stage, filters)
+        estimates.append((stage, end - start))
+    plan = sorted(estimates, key=lambda item: item[1])
+    plan.extend((stage, None) for stage in BITSET_STAGES if filters.get(stage))
+    return plan
+
+
+def filter_positions(df, filters, index):
+    """
+    Posições (em ordem crescente) das linhas que atendem a todos os filtros.
+
+    Retorna (posições, contagens), com as contagens na ordem do plano.
+    """
+    plan = plan_query(filters, index)
+    if not plan or plan[0][1] is None or plan[0][1] > INDEX_MAX_FRACTION * index['rows']:
+        # Nenhum predicado indexado seletivo: máscara combinada sobre o catálogo inteiro
+        mask, counts = filter_mask(df, filters)
+        return np.flatnonzero(mask), counts
+
+    first_stage = plan[0][0]
+    with measure(f"filter:{first_stage}", index['rows']) as record:
+        start, end = _index_slice(index, first_stage, filters)
+        positions = np.sort(index[first_stage][0][start:end])
+        record['rows_out'] = len(positions)
+    counts = [(first_stage, len(positions))]
+
+    for stage, _ in plan[1:]:
+        with measure(f"filter:{stage}", len(positions)) as record:
+            if stage in RANGE_COLUMNS:
+                values = df[RANGE_COLUMNS[stage]].to_numpy()[positions]
+                low, high = filters[stage]
+                keep = (values >= low) & (values <= high)
+            elif stage == 'type':
+                code = index['type_values'].index(filters['type']) if filters['type'] in index['type_values'] else -2
+                keep = index['type_codes'][positions] == code
+            elif stage == 'countries':
+                masks, vocab = get_country_index(df, positions)
+                keep = match_countries(masks, vocab, filters['countries'],
+                                       filters.get('country_mode', 'any'))
+            else:
+                masks, vocab = get_genre_index(df, positions)
+                keep = match_genres(masks, vocab, filters['genres'], filters.get('genre_mode', 'any'))
+            positions = positions[keep]
+            record['rows_out'] = len(positions)
+        counts.append((stage, len(positions)))
+    return positions, counts
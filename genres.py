@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Motor de padronização de gêneros compartilhado entre o pipeline e o app."""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Dicionário de mapeamento para padronizar nomes de gêneros.
+# A ordem importa: as substituições são aplicadas em sequência.
+GENRE_MAPPING = {
+    'action adventure': 'action',
+    'action-adventure': 'action',
+    'sci-fi fantasy': 'science fiction',
+    'war politics': 'war',
+    'film-noir': 'noir',
+    'tv movie': 'movie',
+    'sci-fi': 'science fiction',
+    'science-fiction': 'science fiction',
+    'sci fi': 'science fiction',
+    'reality-tv': 'reality',
+    'talk-show': 'talk show',
+    'game-show': 'game show',
+    'musical': 'music'
+}
+
+# Uma única alternação compilada identifica quais strings precisam de mapeamento
+_MAPPING_PATTERN = re.compile('|'.join(re.escape(k) for k in GENRE_MAPPING))
+_LIST_CHARS_PATTERN = r"[\[\]'\"]"
+_SEPARATORS_PATTERN = r'[,/&;]'
+
+# Combinações consolidadas: se o primeiro gênero existe, o segundo é descartado
+_CONSOLIDATIONS = (
+    ('action', 'adventure'),
+    ('science fiction', 'fantasy'),
+)
+
+
+def clean_and_standardize_genres(genres_str):
+    """
+    Padroniza os gêneros, consolida subgêneros e remove inconsistências,
+    lidando com múltiplos separadores e combinações específicas.
+
+    Versão linha a linha, mantida como referência para o motor vetorizado.
+    """
+    if pd.isna(genres_str) or not isinstance(genres_str, str):
+        return ''
+
+    # 1. Limpa caracteres de lista e converte para minúsculas
+    processed_str = str(genres_str).lower().replace('[','').replace(']','').replace("'",'').replace('"','')
+
+    # 2. Aplica mapeamentos de frases completas primeiro
+    for key, value in GENRE_MAPPING.items():
+        processed_str = processed_str.replace(key, value)
+
+    # 3. Divide a string em uma lista de gêneros usando múltiplos separadores
+    genres_list = re.split(_SEPARATORS_PATTERN, processed_str)
+
+    # 4. Limpa espaços em branco e remove strings vazias, criando um conjunto para valores únicos
+    mapped_genres = {g.strip() for g in genres_list if g.strip()}
+
+    # 5. Lógica de consolidação para combinações específicas
+    for keep, drop in _CONSOLIDATIONS:
+        if keep in mapped_genres and drop in mapped_genres:
+            mapped_genres.remove(drop)
+
+    # 6. Retorna a string final, ordenada e com letras maiúsculas
+    if not mapped_genres:
+        return ''
+    return ','.join(sorted([g.title() for g in mapped_genres]))
+
+
+def _standardize_unique(values):
+    """Padroniza um array de strings distintas com operações de coluna."""
+    s = pd.Series(values, dtype=object).str.lower().str.replace(_LIST_CHARS_PATTERN, '', regex=True)
+
+    # Mapeamentos sequenciais aplicados só às strings que casam com a alternação,
+    # preservando exatamente a semântica de str.replace em cadeia
+    needs_mapping = s.str.contains(_MAPPING_PATTERN, na=False)
+    if needs_mapping.any():
+        mapped = s[needs_mapping]
+        for key, value in GENRE_MAPPING.items():
+            mapped = mapped.str.replace(key, value, regex=False)
+        s[needs_mapping] = mapped
+
+    # Explode em tokens (uma linha por gênero) e remove vazios e duplicados
+    tokens = s.str.split(_SEPARATORS_PATTERN, regex=True).explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != '')]
+    tokens = tokens[~pd.MultiIndex.from_arrays([tokens.index, tokens.to_numpy()]).duplicated()]
+
+    # Consolidação de combinações específicas, vetorizada por grupo
+    for keep, drop in _CONSOLIDATIONS:
+        has_keep = (tokens == keep).groupby(level=0).transform('any')
+        tokens = tokens[~(has_keep & (tokens == drop))]
+
+    titled = tokens.map(str.title).sort_values(kind='stable')
+    joined = titled.groupby(level=0, sort=False).agg(','.join)
+    return joined.reindex(range(len(values)), fill_value='').to_numpy(dtype=object)
+
+
+def standardize_genres(series):
+    """
+    Versão vetorizada de clean_and_standardize_genres para uma coluna inteira.
+
+    Cada string distinta é processada uma única vez (memoização via factorize)
+    e o resultado é espalhado de volta para as linhas pelos códigos.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+
+    # Valores que não são texto viram string vazia, como na versão linha a linha
+    is_str = np.array([isinstance(v, str) for v in uniques], dtype=bool)
+    cleaned = np.full(len(uniques) + 1, '', dtype=object)
+    cleaned[:-1][is_str] = _standardize_unique(uniques[is_str])
+    # O sentinela -1 (nulos) aponta para a última posição, também vazia
+    return pd.Series(cleaned[codes], index=series.index, name=series.name).infer_objects()
+
+
+# --- ÍNDICE MULTI-HOT DE GÊNEROS ---
+# Cada título recebe um conjunto de bits com um bit por gênero do vocabulário,
+# então filtros de gênero viram operações bit a bit vetorizadas. Como no índice
+# de países, o conjunto é dividido em palavras uint64: a palavra 0 fica em
+# genre_mask e as seguintes (só com mais de 64 gêneros) em genre_mask_1,
+# genre_mask_2, ...; o gênero vocab[i] é o bit i % 64 da palavra i // 64.
+
+GENRE_MASK_COLUMN = 'genre_mask'
+GENRE_MASK_PREFIX = GENRE_MASK_COLUMN + '_'
+WORD_BITS = 64
+GENRE_MATCH_MODES = ('any', 'all', 'none')
+
+
+def genre_mask_names(n_words):
+    """Nomes das colunas das palavras do índice: genre_mask, genre_mask_1, ..."""
+    return [GENRE_MASK_COLUMN] + [f"{GENRE_MASK_PREFIX}{word}" for word in range(1, n_words)]
+
+
+def genre_mask_columns(df):
+    """Colunas de palavras do índice de gêneros presentes em df, em ordem."""
+    if GENRE_MASK_COLUMN not in df.columns:
+        return []
+    extra = [c for c in df.columns if isinstance(c, str) and c.startswith(GENRE_MASK_PREFIX)
+             and c[len(GENRE_MASK_PREFIX):].isdigit()]
+    return [GENRE_MASK_COLUMN] + sorted(extra, key=lambda c: int(c[len(GENRE_MASK_PREFIX):]))
+
+
+def _n_words(vocab):
+    return max((len(vocab) + WORD_BITS - 1) // WORD_BITS, 1)
+
+
+def build_genre_index(genres):
+    """
+    Constrói o índice de gêneros a partir da coluna padronizada (separada por vírgulas).
+
+    Retorna (máscaras, vocabulário): um array uint64 linhas × palavras e a
+    lista ordenada de gêneros.
+    """
+    codes, uniques = pd.factorize(genres, use_na_sentinel=True)
+    tokens = pd.Series(np.asarray(uniques, dtype=object)).str.split(',').explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != '')]
+
+    vocab = sorted(tokens.unique())
+    bits = pd.Index(vocab).get_indexer(tokens.to_numpy()).astype(np.uint64)
+    unique_masks = np.zeros((len(uniques) + 1, _n_words(vocab)), dtype=np.uint64)
+    np.bitwise_or.at(unique_masks, (tokens.index.to_numpy(), (bits // WORD_BITS).astype(np.intp)),
+                     np.left_shift(np.uint64(1), bits % np.uint64(WORD_BITS)))
+    # O sentinela -1 (nulos) aponta para a última posição: nenhum gênero
+    return unique_masks[codes], vocab
+
+
+def index_genres(df):
+    """Adiciona as colunas do índice de gêneros e guarda o vocabulário em df.attrs."""
+    masks, vocab = build_genre_index(df['genres'])
+    for column in genre_mask_columns(df):
+        del df[column]
+    for word, column in enumerate(genre_mask_names(masks.shape[1])):
+        df[column] = masks[:, word]
+    df.attrs['genre_vocab'] = vocab
+    return df
+
+
+def get_genre_index(df, positions=None):
+    """
+    Retorna (máscaras linhas × palavras, vocabulário) do DataFrame, construindo
+    o índice se necessário. Com positions, só as máscaras dessas linhas.
+    """
+    vocab = df.attrs.get('genre_vocab')
+    columns = genre_mask_columns(df)
+    rows = slice(None) if positions is None else positions
+    if columns and vocab is not None:
+        if len(columns) == 1:
+            # Uma palavra só (até 64 gêneros): view da coluna, sem cópia
+            return df[GENRE_MASK_COLUMN].to_numpy(dtype=np.uint64)[rows][:, None], vocab
+        return np.column_stack([df[c].to_numpy(dtype=np.uint64)[rows] for c in columns]), vocab
+    masks, vocab = build_genre_index(df['genres'])
+    return masks[rows], vocab
+
+
+def genre_bits(masks, n_genres):
+    """Matriz booleana linhas × gêneros (multi-hot) a partir das máscaras."""
+    bits = np.arange(n_genres, dtype=np.uint64)
+    words = masks[:, (bits // WORD_BITS).astype(np.intp)]
+    return ((words >> (bits % np.uint64(WORD_BITS))) & np.uint64(1)).astype(bool)
+
+
+def factorize_masks(masks):
+    """
+    Combinações distintas de gêneros: (códigos por linha, combinações × palavras),
+    na ordem de primeira aparição, como pd.factorize.
+    """
+    if masks.shape[1] == 1:
+        codes, combos = pd.factorize(masks[:, 0])
+        return codes.astype(np.intp), np.asarray(combos, dtype=np.uint64)[:, None]
+    # Várias palavras: cada linha é lida como um único valor de bytes
+    rows = np.ascontiguousarray(masks).view(np.dtype((np.void, masks.dtype.itemsize * masks.shape[1]))).ravel()
+    codes, combos = pd.factorize(rows)
+    return codes.astype(np.intp), np.asarray(combos).view(np.uint64).reshape(len(combos), masks.shape[1])
+
+
+def genres_to_mask(vocab, genres):
+    """
+    Converte uma lista de gêneros nas palavras de bits correspondentes.
+
+    Retorna (máscara, todos_conhecidos): gêneros fora do vocabulário não têm bit.
+    """
+    positions = pd.Index(vocab).get_indexer(list(genres))
+    known = positions[positions >= 0].astype(np.uint64)
+    mask = np.zeros(_n_words(vocab), dtype=np.uint64)
+    np.bitwise_or.at(mask, (known // WORD_BITS).astype(np.intp),
+                     np.left_shift(np.uint64(1), known % np.uint64(WORD_BITS)))
+    return mask, bool((positions >= 0).all())
+
+
+def match_genres(masks, vocab, genres, mode='any'):
+    """
+    Seleção exata de gêneros por operações bit a bit.
+
+    mode='any': possui pelo menos um dos gêneros (OU)
+    mode='all': possui todos os gêneros (E)
+    mode='none': não possui nenhum dos gêneros
+    """
+    if mode not in GENRE_MATCH_MODES:
+        raise ValueError(f"Modo de gêneros inválido: {mode!r} (use {GENRE_MATCH_MODES})")
+
+    selected, all_known = genres_to_mask(vocab, genres)
+    hits = masks & selected
+    if mode == 'any':
+        return (hits != 0).any(axis=1)
+    if mode == 'all':
+        # Um gênero inexistente no vocabulário não pode ser satisfeito
+        if not all_known:
+            return np.zeros(len(masks), dtype=bool)
+        return (hits == selected).all(axis=1)
+    return (hits == 0).all(axis=1)
+
+
+def get_unique_genres(df):
+    """Lista ordenada dos gêneros presentes no DataFrame, consultada no índice."""
+    masks, vocab = get_genre_index(df)
+    present = np.bitwise_or.reduce(masks, axis=0, initial=np.uint64(0))
+    return [genre for bit, genre in enumerate(vocab) if (int(present[bit // WORD_BITS]) >> (bit % WORD_BITS)) & 1]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Estágio de imputação das avaliações (imdbAverageRating / imdbNumVotes).
+
+'knn' reproduz o KNNImputer original sobre o DataFrame inteiro. 'fast' dá o
+mesmo resultado calculando vizinhos apenas para as linhas com valores ausentes,
+consultando uma KD-tree construída sobre as linhas completas.
+"""
+import numpy as np
+import pandas as pd
+
+IMPUTED_COLS = ['imdbAverageRating', 'imdbNumVotes']
+
+
+def knn_impute(df, cols=IMPUTED_COLS, n_neighbors=3, column_means=None):
+    """
+    Imputação original: KNNImputer sobre todas as linhas.
+
+    column_means (uma média por coluna de cols) substitui as médias locais
+    nas linhas sem nenhuma coluna observada, como em fast_knn_impute.
+    """
+    from sklearn.impute import KNNImputer
+
+    if column_means is not None:
+        empty = df[cols].isnull().all(axis=1)
+        df.loc[empty, cols] = np.asarray(column_means, dtype=np.float64)
+    if df[cols].isnull().any().any():
+        imputer = KNNImputer(n_neighbors=n_neighbors)
+        df[cols] = imputer.fit_transform(df[cols])
+    return df
+
+
+def _strata_keys(df, year_bucket):
+    """Código inteiro de estrato por linha: tipo + faixa de anos (ex.: década)."""
+    years = pd.to_numeric(df['releaseYear'], errors='coerce') // year_bucket
+    codes, _ = pd.MultiIndex.from_arrays([df['type'].astype(str), years]).factorize()
+    return codes
+
+
+def _fill_from_neighbors(values, receivers, donors, observed, missing, n_neighbors, batch_size):
+    """Preenche values[receivers, missing] com a média dos k vizinhos entre os doadores."""
+    from sklearn.neighbors import KDTree
+
+    tree = KDTree(values[np.ix_(donors, observed)])
+    k = min(n_neighbors, len(donors))
+    step = batch_size or len(receivers)
+    for start in range(0, len(receivers), step):
+        batch = receivers[start:start + step]
+        _, neighbors = tree.query(values[np.ix_(batch, observed)], k=k)
+        neighbor_values = values[donors[neighbors]][:, :, missing]
+        values[np.ix_(batch, missing)] = neighbor_values.mean(axis=1)
+
+
+def fast_knn_impute(df, cols=IMPUTED_COLS, n_neighbors=3, stratify=False, year_bucket=10,
+                    batch_size=None, column_means=None):
+    """
+    KNN restrito às linhas com ausências, com vizinhos buscados em uma KD-tree.
+
+    Segue as regras do KNNImputer: a distância usa só as colunas observadas na
+    linha, o valor imputado é a média simples dos k vizinhos e linhas sem
+    nenhuma coluna observada recebem a média da coluna.
+
+    stratify=True busca vizinhos dentro do mesmo tipo e faixa de anos
+    (year_bucket), caindo para o catálogo inteiro se o estrato tiver menos de
+    n_neighbors doadores. batch_size limita quantas linhas são consultadas por
+    vez, mantendo a memória das consultas constante. column_means substitui as
+    médias de df (ex.: médias do catálogo inteiro no modo em blocos).
+    """
+    values = df[cols].to_numpy(dtype=np.float64, copy=True)
+    is_missing = np.isnan(values)
+    if not is_missing.any():
+        return df
+
+    if column_means is None:
+        column_means = np.nanmean(values, axis=0)
+    column_means = np.asarray(column_means, dtype=np.float64)
+    donors_all = np.flatnonzero(~is_missing.any(axis=1))
+    strata = _strata_keys(df, year_bucket) if stratify else None
+
+    # Agrupa as linhas pelo padrão de ausência (quais colunas faltam)
+    patterns, pattern_ids = np.unique(is_missing, axis=0, return_inverse=True)
+    for pattern_id, pattern in enumerate(patterns):
+        if not pattern.any():
+            continue
+        receivers = np.flatnonzero(pattern_ids.ravel() == pattern_id)
+        missing = np.flatnonzero(pattern)
+        observed = np.flatnonzero(~pattern)
+
+        if len(observed) == 0 or len(donors_all) == 0:
+            values[np.ix_(receivers, missing)] = column_means[missing]
+            continue
+
+        if strata is None:
+            _fill_from_neighbors(values, receivers, donors_all, observed, missing, n_neighbors, batch_size)
+            continue
+
+        for stratum in np.unique(strata[receivers]):
+            group = receivers[strata[receivers] == stratum]
+            donors = donors_all[strata[donors_all] == stratum]
+            if len(donors) < n_neighbors:
+                donors = donors_all
+            _fill_from_neighbors(values, group, donors, observed, missing, n_neighbors, batch_size)
+
+    df[cols] = values
+    return df
+
+
+IMPUTERS = {
+    'knn': knn_impute,
+    'fast': fast_knn_impute,
+}
+
+
+def impute_ratings(df, method='fast', **kwargs):
+    """Executa o estágio de imputação escolhido ('knn', 'fast' ou uma função própria)."""
+    imputer = IMPUTERS[method] if isinstance(method, str) else method
+    return imputer(df, **kwargs)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentação por estágio do pipeline.
+
+Desligada por padrão e com custo praticamente nulo nesse caso: measure() devolve
+um contexto vazio reaproveitado. Quando ligada, cada estágio registra tempo de
+parede, linhas de entrada/saída e pico de RSS do processo; com memória ligada,
+também bytes alocados e pico de alocação (tracemalloc). Os registros saem como
+JSON (uma linha por estágio) no logger 'netflix.metrics'.
+
+Variáveis de ambiente (ou configure(), usado pelas flags de linha de comando):
+    NETFLIX_PROFILE=1          liga a instrumentação
+    NETFLIX_PROFILE=memory     liga também o tracemalloc
+    NETFLIX_PROFILE_STAGE=nome roda o cProfile só nesse estágio
+    NETFLIX_PROFILE_LOG=path   grava os registros em arquivo (padrão: stderr)
+"""
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 ** 2
+
+logger = logging.getLogger('netflix.metrics')
+
+_config = {'enabled': False, 'memory': False, 'profile_stage': None}
+# Registros mais recentes; processos longos (o servidor do Streamlit grava
+# estágios a cada execução do script) não acumulam sem limite
+MAX_RECORDS = 10_000
+RECORDS = collections.deque(maxlen=MAX_RECORDS)
+
+
+class _NoopRecord(dict):
+    """Registro descartável usado quando a instrumentação está desligada."""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+_NOOP_CONTEXT = contextlib.nullcontext(_NoopRecord())
+
+
+def configure(enabled=None, memory=None, profile_stage=None, log_path=None):
+    """Liga/desliga a instrumentação e define destino dos registros."""
+    if enabled is not None:
+        _config['enabled'] = enabled
+    if memory is not None:
+        _config['memory'] = memory
+        _config['enabled'] = _config['enabled'] or memory
+    if profile_stage is not None:
+        _config['profile_stage'] = profile_stage
+        _config['enabled'] = True
+
+    if _config['memory'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    if _config['enabled'] and (log_path or not logger.handlers):
+        handler = logging.FileHandler(log_path, encoding='utf-8') if log_path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def configure_from_env():
+    mode = os.environ.get('NETFLIX_PROFILE', '').strip().lower()
+    profile_stage = os.environ.get('NETFLIX_PROFILE_STAGE') or None
+    if mode in ('', '0', 'false') and not profile_stage:
+        return
+    configure(enabled=True, memory=(mode == 'memory'), profile_stage=profile_stage,
+              log_path=os.environ.get('NETFLIX_PROFILE_LOG') or None)
+
+
+def is_enabled():
+    return _config['enabled']
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(peak / (MB if sys.platform == 'darwin' else 1024), 1)
+
+
+@contextlib.contextmanager
+def _measure(name, rows_in):
+    record = {'stage': name, 'rows_in': rows_in}
+    profiler = cProfile.Profile() if name == _config['profile_stage'] else None
+    memory = _config['memory'] and tracemalloc.is_tracing()
+    if memory:
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        record['seconds'] = round(time.perf_counter() - start, 6)
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record['alloc_mb'] = round((current - start_memory) / MB, 3)
+            record['peak_alloc_mb'] = round((peak - start_memory) / MB, 3)
+        record['peak_rss_mb'] = _peak_rss_mb()
+        RECORDS.append(record)
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+        if profiler:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            logger.info(output.getvalue())
+            profiler.dump_stats(f"profile_{name.replace(':', '_')}.prof")
+
+
+def measure(name, rows_in=None):
+    """
+    Contexto que mede um estágio; o registro devolvido aceita campos extras.
+
+        with measure('normalize_genres', len(df)) as record:
+            ...
+            record['rows_out'] = len(result)
+    """
+    if not _config['enabled']:
+        return _NOOP_CONTEXT
+    return _measure(name, rows_in)
+
+
+def summary():
+    """Tabela com os estágios medidos até agora."""
+    if not RECORDS:
+        return
+    def count(value):
+        return f"{value:>12,}" if value is not None else f"{'-':>12}"
+
+    print("\n=== INSTRUMENTAÇÃO POR ESTÁGIO ===")
+    for record in RECORDS:
+        rows = f"{count(record.get('rows_in'))} -> {count(record.get('rows_out', record.get('rows_in')))}"
+        memory = f" | alocado {record['alloc_mb']:9.1f} MB" if 'alloc_mb' in record else ''
+        rss = f" | RSS máx {record['peak_rss_mb']:8.1f} MB" if record.get('peak_rss_mb') is not None else ''
+        print(f"{record['stage']:34s} {record['seconds']:9.4f}s | linhas {rows}{memory}{rss}")
+
+
+configure_from_env()
@@ -1,28 +1,32 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+import argparse
 import os
-import re
-from sklearn.impute import KNNImputer
 
-# Configurações de visualização
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
-plt.rcParams['font.size'] = 12
+from dataset_store import (load_dataset, save_columnar, row_keys, hash_rows, load_manifest, save_manifest,
+                           compact_frame, memory_report)
+from countries import standardize_countries, index_countries, country_mask_columns
+from cube import genre_cooccurrence
+from filtering import filter_mask, filter_positions, select_rows
+from imputation import IMPUTED_COLS, impute_ratings
+import instrumentation
+from instrumentation import measure
+# matplotlib/seaborn só são importados por plotting.py ao gerar a primeira figura
+from plotting import aggregate_for_plots, render_figures, render_seaborn_figures
+from genres import GENRE_MASK_COLUMN, genre_mask_columns, standardize_genres, index_genres
+# Reexportada: clean_and_standardize_genres era definida aqui antes de genres.py
+from genres import clean_and_standardize_genres
 
 def load_data(file_path):
-    """Carrega os dados com tratamento"""
+    """Carrega os dados com tratamento (artefato colunar, se atualizado, ou CSV)"""
     try:
-        df = pd.read_csv(file_path, encoding='utf-8-sig')
-        print(f"\nDados carregados: {len(df):,} registros")
-        
-        
-        required_cols = {'title', 'type', 'genres', 'releaseYear', 'imdbAverageRating', 'imdbNumVotes'}
-        missing_cols = required_cols - set(df.columns)
-        if missing_cols:
-            raise ValueError(f"Colunas faltantes: {missing_cols}")
+        # O esquema (REQUIRED_COLS) é validado em load_dataset
+        with measure('load', None) as record:
+            df, source = load_dataset(file_path)
+            record['rows_out'] = len(df)
+            record['source'] = source
+        print(f"\nDados carregados: {len(df):,} registros (origem: {source})")
         
         return df
     
@@ -30,117 +34,320 @@ def load_data(file_path):
         print(f"\nERRO ao carregar dados: {str(e)}")
         return None
 
-def clean_and_standardize_genres(genres_str):
+def preprocess_data(df, year_fill=None, imputer='fast', **imputer_kwargs):
+    """
+    Converte tipos, padroniza gêneros e países e imputa avaliações.
+
+    year_fill substitui a mediana local de releaseYear (usado no modo em blocos,
+    em que a mediana vem do catálogo inteiro). imputer escolhe o estágio de
+    imputação ('fast', 'knn' ou uma função), ver imputation.py.
     """
-    Padroniza os gêneros, consolida subgêneros e remove inconsistências,
-    lidando com múltiplos separadores e combinações específicas.
+    # Converter tipos
+    with measure('coerce_types', len(df)):
+        df['releaseYear'] = pd.to_numeric(df['releaseYear'], errors='coerce')
+        df['imdbAverageRating'] = pd.to_numeric(df['imdbAverageRating'], errors='coerce')
+        df['imdbNumVotes'] = pd.to_numeric(df['imdbNumVotes'], errors='coerce')
+        
+        if year_fill is None:
+            year_fill = df['releaseYear'].median()
+        df['releaseYear'] = df['releaseYear'].fillna(year_fill).astype(int)
+    
+    # Motor vetorizado: cada string distinta de gêneros é limpa uma única vez
+    with measure('normalize_genres', len(df)):
+        df['genres'] = standardize_genres(df['genres'].fillna('Unknown'))
+    
+    # Países padronizados uma vez; o índice de bits (countries.py) sai desta coluna
+    if 'availableCountries' in df.columns:
+        with measure('normalize_countries', len(df)):
+            df['availableCountries'] = standardize_countries(df['availableCountries'])
+    
+    # Aplicar KNN para avaliações (só as linhas com ausências no modo 'fast')
+    with measure('impute', len(df)) as record:
+        df = impute_ratings(df, imputer, **imputer_kwargs)
+        # Votos são contagens: a média dos vizinhos vira inteiro aqui, uma única
+        # vez, e CSV, artefato colunar e app passam a somar os mesmos votos
+        df['imdbNumVotes'] = df['imdbNumVotes'].round()
+        record['rows_out'] = len(df)
+    
+    return df
+
+# --- MODO EM BLOCOS (STREAMING) ---
+# Para catálogos maiores que a memória: o CSV bruto é lido em blocos duas vezes.
+# A 1ª passada acumula estatísticas globais; a 2ª processa e grava cada bloco.
+
+RATING_BINS = np.linspace(0, 10, 101)        # passo de 0.1, igual ao slider do app
+VOTES_LOG_BINS = np.linspace(0, 8, 161)      # log10(votos + 1), até 100 milhões
+
+def _median_from_counts(counts):
+    """Mediana exata (mesma regra do pandas) a partir de contagens por valor."""
+    if counts.empty:
+        return np.nan
+    counts = counts.sort_index()
+    cumulative = counts.cumsum().to_numpy()
+    total = cumulative[-1]
+    values = counts.index.to_numpy(dtype=float)
+    lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+    upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+def _histogram_quantiles(counts, edges, quantiles):
+    """Quantis aproximados (resolução de um bin) a partir de um histograma."""
+    cumulative = np.cumsum(counts)
+    if cumulative[-1] == 0:
+        return {q: np.nan for q in quantiles}
+    positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1])
+    return {q: edges[min(p + 1, len(edges) - 1)] for q, p in zip(quantiles, positions)}
+
+def scan_statistics(file_path, chunksize=100_000):
     """
-    if pd.isna(genres_str) or not isinstance(genres_str, str):
-        return ''
-
-    # Dicionário de mapeamento para padronizar nomes de gêneros
-    genre_mapping = {
-        'action adventure': 'action',
-        'action-adventure': 'action',
-        'sci-fi fantasy': 'science fiction',
-        'war politics': 'war',
-        'film-noir': 'noir',
-        'tv movie': 'movie',
-        'sci-fi': 'science fiction',
-        'science-fiction': 'science fiction',
-        'sci fi': 'science fiction',
-        'reality-tv': 'reality',
-        'talk-show': 'talk show',
-        'game-show': 'game show',
-        'musical': 'music'
+    1ª passada: estatísticas globais do CSV bruto sem carregá-lo inteiro.
+
+    Guarda também os doadores da imputação (linhas com nota e votos: só as
+    colunas imputadas, tipo e ano, indexadas pela posição no CSV), para que a
+    2ª passada busque vizinhos no catálogo inteiro.
+    """
+    year_counts = pd.Series(dtype='int64')
+    rating_hist = np.zeros(len(RATING_BINS) - 1, dtype=np.int64)
+    votes_hist = np.zeros(len(VOTES_LOG_BINS) - 1, dtype=np.int64)
+    rows = missing_ratings = 0
+    # Somas e contagens das colunas imputadas: médias globais para o fallback da imputação
+    sums = np.zeros(len(IMPUTED_COLS))
+    counts = np.zeros(len(IMPUTED_COLS), dtype=np.int64)
+    donors = []
+
+    usecols = ['type', 'releaseYear', 'imdbAverageRating', 'imdbNumVotes']
+    for chunk in pd.read_csv(file_path, encoding='utf-8-sig', usecols=usecols, chunksize=chunksize):
+        rows += len(chunk)
+        years = pd.to_numeric(chunk['releaseYear'], errors='coerce').dropna()
+        year_counts = year_counts.add(years.value_counts(), fill_value=0)
+
+        imputed = chunk[IMPUTED_COLS].apply(pd.to_numeric, errors='coerce')
+        sums += imputed.sum().to_numpy()
+        counts += imputed.count().to_numpy()
+        complete = imputed.notna().all(axis=1)
+        donors.append(imputed[complete].assign(
+            type=chunk.loc[complete, 'type'].astype('category'),
+            releaseYear=pd.to_numeric(chunk.loc[complete, 'releaseYear'], errors='coerce')))
+
+        ratings = imputed['imdbAverageRating']
+        missing_ratings += int(ratings.isna().sum())
+        rating_hist += np.histogram(ratings.dropna(), bins=RATING_BINS)[0]
+
+        votes = imputed['imdbNumVotes'].dropna()
+        votes_hist += np.histogram(np.log10(votes.clip(lower=0) + 1), bins=VOTES_LOG_BINS)[0]
+
+    quantiles = (0.25, 0.5, 0.75)
+    year_median = _median_from_counts(year_counts)
+    donors = pd.concat(donors) if donors else pd.DataFrame(columns=IMPUTED_COLS + ['type', 'releaseYear'])
+    # Mesmo preenchimento de ano que o preprocess_data dá às linhas dos blocos
+    donors['releaseYear'] = donors['releaseYear'].fillna(year_median)
+    return {
+        'rows': rows,
+        'missing_ratings': missing_ratings,
+        'year_median': year_median,
+        'donors': donors,
+        'column_means': np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0),
+        'rating_histogram': rating_hist,
+        'rating_quantiles': _histogram_quantiles(rating_hist, RATING_BINS, quantiles),
+        'votes_quantiles': {q: 10 ** v - 1 for q, v in
+                            _histogram_quantiles(votes_hist, VOTES_LOG_BINS, quantiles).items()},
     }
 
-    # 1. Limpa caracteres de lista e converte para minúsculas
-    processed_str = str(genres_str).lower().replace('[','').replace(']','').replace("'",'').replace('"','')
-    
-    # 2. Aplica mapeamentos de frases completas primeiro
-    for key, value in genre_mapping.items():
-        processed_str = processed_str.replace(key, value)
+def preprocess_in_chunks(input_path, output_path, chunksize=100_000, imputer='fast', **imputer_kwargs):
+    """
+    Pré-processa o CSV bruto em blocos, com memória limitada pelo tamanho do bloco.
 
-    # 3. Divide a string em uma lista de gêneros usando múltiplos separadores
-    genres_list = re.split(r'[,/&;]', processed_str)
-    
-    # 4. Limpa espaços em branco e remove strings vazias, criando um conjunto para valores únicos
-    mapped_genres = {g.strip() for g in genres_list if g.strip()}
+    Tipos e gêneros são tratados por bloco; a mediana de releaseYear, as médias
+    das colunas imputadas e os doadores da imputação vêm da 1ª passada (catálogo
+    inteiro). Cada bloco busca vizinhos entre as suas linhas completas e os
+    doadores dos outros blocos, então a imputação não depende de chunksize
+    (a não ser por empates de distância, como no modo incremental). Os doadores
+    ficam em memória: quatro colunas por linha completa do catálogo.
+    A saída é gravada incrementalmente em um arquivo temporário e trocada no final.
+    """
+    stats = scan_statistics(input_path, chunksize)
+    print(f"\n1ª passada: {stats['rows']:,} registros | mediana de ano: {stats['year_median']:.0f} "
+          f"| avaliações ausentes: {stats['missing_ratings']:,}")
+    print(f"Quartis de avaliação: { {q: round(float(v), 1) for q, v in stats['rating_quantiles'].items()} }")
+    print(f"Quartis de votos (aprox.): { {q: round(float(v)) for q, v in stats['votes_quantiles'].items()} }")
 
-    # 5. Lógica de consolidação para combinações específicas
-    # Se um filme é 'Action' e 'Adventure', consideramos apenas 'Action'.
-    if 'action' in mapped_genres and 'adventure' in mapped_genres:
-        mapped_genres.remove('adventure')
-    
-    # Se um filme é 'Science Fiction' e 'Fantasy', consideramos apenas 'Science Fiction'.
-    if 'science fiction' in mapped_genres and 'fantasy' in mapped_genres:
-        mapped_genres.remove('fantasy')
+    # Funções próprias de imputação não recebem as médias globais
+    if isinstance(imputer, str):
+        imputer_kwargs.setdefault('column_means', stats['column_means'])
 
-    # 6. Retorna a string final, ordenada e com letras maiúsculas
-    if not mapped_genres:
-        return ''
-    return ','.join(sorted([g.title() for g in mapped_genres]))
+    donors = stats['donors']
+    tmp_path = output_path + '.tmp'
+    written = 0
+    reader = pd.read_csv(input_path, encoding='utf-8-sig', chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        # Os doadores do próprio bloco já estão nele (o índice é a posição no CSV)
+        start, stop = donors.index.searchsorted([chunk.index[0], chunk.index[-1] + 1])
+        others = pd.concat([donors.iloc[:start], donors.iloc[stop:]])
+        chunk = preprocess_data(chunk, year_fill=stats['year_median'],
+                                imputer=lambda frame, others=others, **kw: _impute_with_donors(frame, others, imputer, **kw),
+                                **imputer_kwargs)
+        # O BOM do utf-8-sig só pode ir no início do arquivo
+        chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     encoding='utf-8-sig' if i == 0 else 'utf-8')
+        written += len(chunk)
+        print(f"Bloco {i + 1}: {written:,}/{stats['rows']:,} registros gravados")
 
-def preprocess_data(df):
-    # Converter tipos
-    df['releaseYear'] = pd.to_numeric(df['releaseYear'], errors='coerce')
-    df['imdbAverageRating'] = pd.to_numeric(df['imdbAverageRating'], errors='coerce')
-    df['imdbNumVotes'] = pd.to_numeric(df['imdbNumVotes'], errors='coerce')
-    
-    
-    df['releaseYear'] = df['releaseYear'].fillna(df['releaseYear'].median()).astype(int)
-    df['genres'] = df['genres'].fillna('Unknown')
-    
-   
-    df['genres'] = df['genres'].apply(clean_and_standardize_genres)
-    
-    # Aplicar KNN para avaliações
-    if df[['imdbAverageRating', 'imdbNumVotes']].isnull().any().any():
-        imputer = KNNImputer(n_neighbors=3)
-        df[['imdbAverageRating', 'imdbNumVotes']] = imputer.fit_transform(
-            df[['imdbAverageRating', 'imdbNumVotes']])
-    
-    return df
+    os.replace(tmp_path, output_path)
+    print(f"\nDados processados em blocos e guardados em: {output_path}")
+    return stats
 
-def apply_filters(df, filters):
-    """Aplica filtros com diagnóstico"""
-    filtered_df = df.copy()
-    
-    print("\n=== DIAGNÓSTICO DOS FILTROS ===")
-    print(f"Registros iniciais: {len(filtered_df):,}")
-    
-    
-    if 'years' in filters:
+# --- MODO INCREMENTAL ---
+# Para atualizações diárias em que só uma fração pequena do catálogo muda: cada
+# linha do CSV bruto é identificada por imdbId e um hash do seu conteúdo. Só as
+# linhas novas ou alteradas passam por tipos, gêneros e imputação; as demais
+# são reaproveitadas do catálogo processado e as removidas são descartadas.
+
+def _impute_with_donors(delta, donors, method='fast', **imputer_kwargs):
+    """
+    Imputa as linhas de delta usando também os doadores já processados.
+
+    Os doadores são as linhas inalteradas que tinham notas e votos no CSV
+    bruto, então o conjunto de vizinhos candidatos é o mesmo de um processamento
+    completo. A ordem dos doadores é outra, e empates de distância na KD-tree
+    podem escolher vizinhos diferentes dos de uma reconstrução completa.
+    """
+    columns = IMPUTED_COLS + ['type', 'releaseYear']
+    combined = pd.concat([delta[columns], donors[columns]], ignore_index=True)
+    combined = impute_ratings(combined, method, **imputer_kwargs)
+    delta[IMPUTED_COLS] = combined[IMPUTED_COLS].to_numpy()[:len(delta)]
+    return delta
+
+def preprocess_incremental(input_path, output_path, imputer='fast', **imputer_kwargs):
+    """
+    Atualiza o catálogo processado só com as linhas novas ou alteradas do CSV bruto.
+
+    Sem manifesto válido (primeira execução, ou CSV processado regravado por
+    outro caminho) todas as linhas são processadas. Linhas inalteradas mantêm
+    a imputação da execução em que foram processadas. Retorna o catálogo
+    processado e indexado, ou None se nada mudou.
+    """
+    raw = pd.read_csv(input_path, encoding='utf-8-sig', dtype=str)
+    keys, hashes = row_keys(raw), hash_rows(raw)
+
+    manifest = load_manifest(output_path)
+    previous = None
+    if manifest is not None:
+        # Direto do CSV tratado, que é a fonte do artefato colunar
+        previous = pd.read_csv(output_path, encoding='utf-8-sig')
+        if len(previous) != len(manifest[0]):
+            previous = None
+
+    if previous is None:
+        old_positions = np.full(len(raw), -1)
+        unchanged = np.zeros(len(raw), dtype=bool)
+        deleted = 0
+    else:
+        old_keys, old_hashes = manifest
+        old_positions = pd.Index(old_keys).get_indexer(keys)
+        unchanged = (old_positions >= 0) & (old_hashes[old_positions] == hashes)
+        deleted = len(old_keys) - int(np.count_nonzero(old_positions >= 0))
+
+    inserted = int(np.count_nonzero(old_positions < 0))
+    changed = len(raw) - inserted - int(np.count_nonzero(unchanged))
+    print(f"\nIncremental: {inserted:,} novos | {changed:,} alterados | {deleted:,} removidos "
+          f"| {int(np.count_nonzero(unchanged)):,} inalterados"
+          + (" (sem manifesto válido: processamento completo)" if previous is None else ""))
+    if previous is not None and unchanged.all() and deleted == 0:
+        print("Nada a atualizar.")
+        return None
+
+    kept = previous.drop(columns=GENRE_MASK_COLUMN, errors='ignore').reindex(columns=raw.columns) \
+        if previous is not None else raw.iloc[:0]
+    kept = kept.take(old_positions[unchanged])
+
+    delta = raw[~unchanged].copy()
+    if len(delta):
+        # Mesma mediana de ano e mesmos doadores de um processamento completo
+        year_fill = pd.to_numeric(raw['releaseYear'], errors='coerce').median()
+        observed = raw[IMPUTED_COLS].apply(pd.to_numeric, errors='coerce').notna().all(axis=1).to_numpy()
+        donors = kept[observed[unchanged]]
+        delta = preprocess_data(delta, year_fill=year_fill,
+                                imputer=lambda frame, **kw: _impute_with_donors(frame, donors, imputer, **kw),
+                                **imputer_kwargs)
+
+    # Junta na ordem do CSV bruto
+    positions = np.concatenate([np.flatnonzero(unchanged), np.flatnonzero(~unchanged)])
+    merged = pd.concat([kept, delta], ignore_index=True).take(np.argsort(positions, kind='stable'))
+    merged = merged.reset_index(drop=True)
+    merged['releaseYear'] = merged['releaseYear'].astype(int)
+    # CSVs tratados por versões anteriores guardam votos imputados fracionários
+    merged['imdbNumVotes'] = merged['imdbNumVotes'].round()
+
+    tmp_path = output_path + '.tmp'
+    merged.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, output_path)
+    save_manifest(output_path, keys, hashes)
+
+    merged = index_countries(index_genres(merged))
+    save_columnar(merged, output_path)
+    print(f"Catálogo atualizado em: {output_path} ({len(merged):,} registros, {len(delta):,} reprocessados)")
+    return merged
+
+def _print_filter_stage(stage, count, previous, filters):
+    """Linha do diagnóstico para um estágio de filtro."""
+    if stage == 'years':
         year_min, year_max = filters['years']
-        filtered_df = filtered_df[filtered_df['releaseYear'].between(year_min, year_max)]
-        print(f"Após filtrar anos ({year_min}-{year_max}): {len(filtered_df):,}")
-    
-    
-    if 'rating_range' in filters:
+        print(f"Após filtrar anos ({year_min}-{year_max}): {count:,}")
+    elif stage == 'rating_range':
         rating_min, rating_max = filters['rating_range']
-        filtered_df = filtered_df[filtered_df['imdbAverageRating'].between(rating_min, rating_max)]
-        print(f"Após filtrar avaliações ({rating_min}-{rating_max}): {len(filtered_df):,}")
-    
-    
-    if 'type' in filters:
-        if filters['type'] != 'Todos':
-            before = len(filtered_df)
-            filtered_df = filtered_df[filtered_df['type'] == filters['type']]
-            print(f"Após filtrar tipo ({filters['type']}): {len(filtered_df):,} (removidos {before - len(filtered_df):,})")
-        else:
-            print("Nenhum filtro de tipo aplicado ('Todos' selecionado)")
-    
-    
-    if 'genres' in filters and filters['genres']:
-        genre_pattern = '|'.join([re.escape(g) for g in filters['genres']])
-        filtered_df = filtered_df[filtered_df['genres'].str.contains(genre_pattern, na=False, regex=True)]
-        print(f"Após filtrar gêneros ({filters['genres']}): {len(filtered_df):,}")
+        print(f"Após filtrar avaliações ({rating_min}-{rating_max}): {count:,}")
+    elif stage == 'type':
+        print(f"Após filtrar tipo ({filters['type']}): {count:,} (removidos {previous - count:,})")
+    elif stage == 'genres':
+        genre_mode = filters.get('genre_mode', 'any')
+        print(f"Após filtrar gêneros ({filters['genres']}, modo {genre_mode}): {count:,}")
+    elif stage == 'countries':
+        country_mode = filters.get('country_mode', 'any')
+        print(f"Após filtrar países ({filters['countries']}, modo {country_mode}): {count:,}")
+
+def apply_filters(df, filters, return_index=False, index=None):
+    """
+    Aplica filtros com diagnóstico.
+
+    Os predicados são combinados em uma única máscara e só a seleção final é
+    materializada. Com index (ver filtering.build_query_index), o planejador
+    resolve o predicado mais seletivo por searchsorted e avalia os demais só
+    sobre os candidatos. Com return_index=True retorna as posições das linhas
+    selecionadas (ver filtering.select_rows) em vez de um novo DataFrame.
+    """
+    if index is not None:
+        positions, counts = filter_positions(df, filters, index)
+    else:
+        mask, counts = filter_mask(df, filters)
+        positions = np.flatnonzero(mask)
     
-    return filtered_df
+    print("\n=== DIAGNÓSTICO DOS FILTROS ===")
+    print(f"Registros iniciais: {len(df):,}")
+    if index is not None:
+        print(f"Plano de consulta: {' -> '.join(stage for stage, _ in counts)}")
+    
+    previous = len(df)
+    for stage, count in counts:
+        _print_filter_stage(stage, count, previous, filters)
+        previous = count
+    
+    if filters.get('type') == 'Todos':
+        print("Nenhum filtro de tipo aplicado ('Todos' selecionado)")
+    
+    if return_index:
+        return positions
+    with measure('filter:select', len(positions)):
+        return select_rows(df, positions)
+
+def generate_visualizations(filtered_df, output_dir='output', backend='seaborn', dpi=300, fmt='png',
+                            workers=None):
+    """
+    Gera visualizações e salva em arquivos.
 
-def generate_visualizations(filtered_df, output_dir='output'):
-    """Gera visualizações e salva em arquivos"""
+    backend='fast' pré-agrega os dados e desenha com primitivas do matplotlib
+    (ver plotting.py), sem KDE; workers > 1 renderiza as figuras em paralelo.
+    dpi e fmt (png, svg, pdf...) valem para os dois backends.
+    """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
@@ -148,61 +355,26 @@ def generate_visualizations(filtered_df, output_dir='output'):
         print("\nAVISO: Nenhum dado para visualizações")
         return
     
-    try:
-        # Gráfico 1: Top gêneros 
-        plt.figure()
-        genre_counts = (filtered_df['genres'].str.split(',')
-                       .explode()
-                       .str.strip()
-                       .value_counts()
-                       .reset_index())
-        genre_counts.columns = ['Gênero', 'Contagem']
-        genre_counts['Gênero'] = genre_counts['Gênero'].apply(lambda x: re.sub(r'[^\w\s-]', '', x))
-        genre_counts = genre_counts.groupby('Gênero').sum().reset_index().sort_values('Contagem', ascending=False).head(10)
-        
-        sns.barplot(data=genre_counts, x='Contagem', y='Gênero', palette="viridis")
-        plt.title(f"Top Gêneros (n={len(filtered_df):,})")
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/top_generos.png", dpi=300)
-        plt.close()
-        
-        # Distribuição de avaliações para o gênero mais popular
-        plt.figure()
-        most_popular_genre = genre_counts.iloc[0]['Gênero']
-        sns.histplot(
-            filtered_df[filtered_df['genres'].str.contains(re.escape(most_popular_genre))],
-            x='imdbAverageRating',
-            bins=20,
-            kde=True,
-            color='skyblue'
-        )
-        plt.title(f"Distribuição de Avaliações - {most_popular_genre} (n={len(filtered_df):,})")
-        plt.savefig(f"{output_dir}/distribuicao_avaliacoes.png", dpi=300)
-        plt.close()
-        
-        #  Evolução temporal
-        if filtered_df['releaseYear'].nunique() > 1:
-            plt.figure()
-            sns.lineplot(
-                data=filtered_df,
-                x='releaseYear',
-                y='imdbAverageRating',
-                estimator='mean',
-                errorbar=None,
-                color='royalblue',
-                linewidth=2
-            )
-            plt.title(f"Evolução Temporal (n={len(filtered_df):,})")
-            plt.savefig(f"{output_dir}/evolucao_temporal.png", dpi=300)
-            plt.close()
-        
-        print(f"\nVisualizações salvas em: {os.path.abspath(output_dir)}")
+    if backend == 'fast':
+        with measure('aggregate_plots', len(filtered_df)):
+            aggregates = aggregate_for_plots(filtered_df)
+        paths = render_figures(aggregates, output_dir, dpi=dpi, fmt=fmt, workers=workers)
+        print(f"\nVisualizações salvas em: {os.path.abspath(output_dir)} ({len(paths)} figuras)")
+        return
     
-    except Exception as e:
-        print(f"\nERRO ao gerar gráficos: {str(e)}")
+    render_seaborn_figures(filtered_df, output_dir, dpi=dpi, fmt=fmt)
+
+def compute_metrics(filtered_df):
+    """Métricas resumidas de um recorte do catálogo"""
+    return {
+        'total': len(filtered_df),
+        'avg_rating': filtered_df['imdbAverageRating'].mean(),
+        'total_votes': filtered_df['imdbNumVotes'].sum(),
+        'avg_year': filtered_df['releaseYear'].mean()
+    }
 
-def analyze_data(df, filters=None):
-    """Executa análise completa"""
+def analyze_data(df, filters=None, **plot_options):
+    """Executa análise completa (plot_options vão para generate_visualizations)"""
     if filters is None:
         filters = {
             'years': (2000, 2023),
@@ -227,12 +399,7 @@ def analyze_data(df, filters=None):
         return
     
     
-    metrics = {
-        'total': len(filtered_df),
-        'avg_rating': filtered_df['imdbAverageRating'].mean(),
-        'total_votes': filtered_df['imdbNumVotes'].sum(),
-        'avg_year': filtered_df['releaseYear'].mean()
-    }
+    metrics = compute_metrics(filtered_df)
     
     print("\n=== RESULTADOS ===")
     print(f"Total de títulos: {metrics['total']:,}")
@@ -240,15 +407,58 @@ def analyze_data(df, filters=None):
     print(f"Votos totais: {metrics['total_votes']:,.0f}")
     print(f"Ano médio: {int(metrics['avg_year'])}")
     
+    # Pares de gêneros do recorte (títulos, nota média e lift), gravados ao lado das figuras
+    with measure('genre_cooccurrence', len(filtered_df)):
+        pairs = genre_cooccurrence(filtered_df)
+    output_dir = plot_options.get('output_dir', 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    pairs_path = os.path.join(output_dir, 'coocorrencia_generos.csv')
+    pairs.to_csv(pairs_path, index=False, encoding='utf-8-sig')
+    print(f"\nPares de gêneros mais frequentes (co-ocorrência salva em: {pairs_path}):")
+    print(pairs.head(5).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    
     
-    generate_visualizations(filtered_df)
+    generate_visualizations(filtered_df, **plot_options)
 
-def main():
+def main(argv=None):
     print("=== ANÁLISE DE CATÁLOGO NETFLIX ===")
     
     
     DATA_PATH = 'C:/Users/mulin/OneDrive/Documentos/analysis-genre-netflix/data/processed/data_tratada.csv'  # Caminho relativo para GitHub
     OUTPUT_DIR = 'output'
+
+    parser = argparse.ArgumentParser(description="Pipeline de análise do catálogo Netflix")
+    parser.add_argument('--stream', metavar='CSV_BRUTO',
+                        help="Pré-processa o CSV bruto em blocos e grava em DATA_PATH (sem análise)")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Registros por bloco no modo --stream")
+    parser.add_argument('--incremental', metavar='CSV_BRUTO',
+                        help="Atualiza DATA_PATH só com os títulos novos/alterados do CSV bruto (sem análise)")
+    parser.add_argument('--fast-plots', action='store_true',
+                        help="Renderização rápida a partir de dados pré-agregados (sem KDE)")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolução das figuras (ex.: 72 para prévias)")
+    parser.add_argument('--format', default='png', help="Formato das figuras: png, svg, pdf...")
+    parser.add_argument('--profile', action='store_true',
+                        help="Registra tempo, linhas e RSS de cada estágio (ou NETFLIX_PROFILE=1)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Inclui bytes alocados por estágio via tracemalloc (mais lento)")
+    parser.add_argument('--profile-stage', metavar='ESTAGIO',
+                        help="Roda o cProfile só nesse estágio (ex.: normalize_genres, filter:genres)")
+    parser.add_argument('--profile-log', metavar='ARQUIVO', help="Grava os registros JSON nesse arquivo")
+    args = parser.parse_args(argv)
+
+    if args.profile or args.profile_memory or args.profile_stage:
+        instrumentation.configure(enabled=True, memory=args.profile_memory or None,
+                                  profile_stage=args.profile_stage, log_path=args.profile_log)
+
+    if args.stream:
+        preprocess_in_chunks(args.stream, DATA_PATH, args.chunksize)
+        instrumentation.summary()
+        return
+
+    if args.incremental:
+        preprocess_incremental(args.incremental, DATA_PATH)
+        instrumentation.summary()
+        return
     
     
     df = load_data(DATA_PATH)
@@ -259,19 +469,37 @@ def main():
     df = preprocess_data(df)
 
     # Guarda o DataFrame limpo, substituindo o ficheiro antigo
-    df.to_csv(DATA_PATH, index=False, encoding='utf-8-sig')
+    df.drop(columns=[*genre_mask_columns(df), *country_mask_columns(df)], errors='ignore').to_csv(
+        DATA_PATH, index=False, encoding='utf-8-sig')
     print(f"\nDados limpos e guardados com sucesso em: {DATA_PATH}")
+
+    # Índices de gêneros e de países construídos uma vez, reaproveitados por todos os filtros
+    df = index_countries(index_genres(df))
+
+    # Artefato colunar tipado: as próximas cargas não precisam reinterpretar o CSV
+    artifact = save_columnar(df, DATA_PATH)
+    print(f"Artefato colunar salvo em: {artifact}")
+
+    # Layout compacto para a análise (categorias e tipos numéricos menores)
+    compact = compact_frame(df)
+    report = memory_report(df, compact)
+    print("\n=== MEMÓRIA (bytes) ===")
+    print(report.to_string())
+    df = compact
     
     # Filtros padrão 
     my_filters = {
         'years': (2000, 2023),      # Intervalo de anos
         'rating_range': (6.0, 10.0), # Avaliação mínima e máxima
         'type': 'movie',             # 'Todos' para incluir tudo
-        'genres': ['Action', 'Adventure', 'Comedy']  # Lista vazia [] para todos
+        'genres': ['Action', 'Adventure', 'Comedy'],  # Lista vazia [] para todos
+        'genre_mode': 'any'          # 'any' (OU), 'all' (E) ou 'none' (exclui)
     }
     
     # Análise
-    analyze_data(df, my_filters)
+    analyze_data(df, my_filters, backend='fast' if args.fast_plots else 'seaborn',
+                 dpi=args.dpi, fmt=args.format)
+    instrumentation.summary()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
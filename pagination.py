@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Tabela paginada do recorte filtrado: ordenação e busca por título no servidor.
+
+As ordens de cada coluna numérica são calculadas uma vez para o catálogo
+inteiro (argsort estável); a ordem de um recorte sai dessa permutação filtrada
+pela seleção, sem reordenar as linhas. A busca por título usa um índice
+invertido de palavras (sem acentos, em minúsculas) com casamento por prefixo.
+Cada página copia só as suas linhas, então o custo por página não depende do
+tamanho do recorte.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SORTABLE_COLUMNS = ('imdbAverageRating', 'imdbNumVotes', 'releaseYear')
+PAGE_SIZES = (25, 50, 100, 250)
+
+# Abaixo desta fração do catálogo é mais barato ordenar só o recorte do que
+# percorrer a permutação global inteira
+SORT_GATHER_FRACTION = 0.05
+
+_WORD = re.compile(r'\w+')
+
+
+def sort_order(values, descending=False):
+    """Permutação estável que ordena values; nulos sempre no fim."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.argsort(-values if descending else values, kind='stable')
+
+
+def order_selection(values, positions, order=None, descending=False):
+    """
+    Posições da seleção (em ordem crescente) ordenadas por values.
+
+    Com order (sort_order do catálogo inteiro) e uma seleção grande, a ordem
+    sai da permutação global; seleções pequenas são ordenadas diretamente.
+    Empates ficam na ordem das linhas nos dois caminhos.
+    """
+    positions = np.asarray(positions)
+    if order is not None and len(positions) > SORT_GATHER_FRACTION * len(values):
+        selected = np.zeros(len(values), dtype=bool)
+        selected[positions] = True
+        return order[selected[order]]
+    return positions[sort_order(np.asarray(values)[positions], descending)]
+
+
+def _fold(text):
+    """Minúsculas e sem acentos, para buscar 'pokemon' em 'Pokémon'."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def build_title_index(titles):
+    """
+    Índice invertido palavra -> títulos -> linhas.
+
+    Cada título distinto é tokenizado uma vez. As palavras ficam ordenadas, com
+    as listas de títulos contíguas (formato CSR), então todas as palavras com
+    um prefixo formam uma única fatia.
+    """
+    codes, uniques = pd.factorize(titles)
+    words = pd.Series([_fold(str(title)) for title in uniques], dtype=object).str.findall(_WORD).explode().dropna()
+    vocab, word_codes = np.unique(words.to_numpy(dtype=str), return_inverse=True)
+    order = np.lexsort((words.index.to_numpy(), word_codes))
+
+    row_order = np.argsort(codes, kind='stable')
+    return {
+        'vocab': vocab,
+        'word_titles': words.index.to_numpy()[order],
+        'word_offsets': np.searchsorted(word_codes[order], np.arange(len(vocab) + 1)),
+        'title_rows': row_order,
+        'title_offsets': np.searchsorted(codes[row_order], np.arange(len(uniques) + 1)),
+    }
+
+
+def search_titles(index, query):
+    """
+    Linhas (em ordem crescente) cujo título contém todas as palavras da busca,
+    cada uma como início de uma palavra do título. None se a busca está vazia.
+    """
+    terms = _WORD.findall(_fold(query))
+    if not terms:
+        return None
+
+    matched = None
+    for term in terms:
+        low = np.searchsorted(index['vocab'], term, side='left')
+        high = np.searchsorted(index['vocab'], term + '\U0010ffff', side='left')
+        offsets = index['word_offsets']
+        titles = np.unique(index['word_titles'][offsets[low]:offsets[high]])
+        matched = titles if matched is None else np.intersect1d(matched, titles, assume_unique=True)
+
+    starts = index['title_offsets'][matched]
+    lengths = index['title_offsets'][matched + 1] - starts
+    # Concatena as fatias de linhas de cada título sem laço em Python
+    flat = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.sort(index['title_rows'][flat])
+
+
+def page_bounds(total, page, page_size):
+    """(início, fim, número de páginas) da página pedida (1-based, limitada ao intervalo)."""
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), pages
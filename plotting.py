@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Renderização rápida das figuras do relatório.
+
+Em vez de passar as linhas filtradas para o seaborn (que refaz agregações e
+ajusta uma KDE), os dados de cada gráfico são pré-agregados em arrays pequenos
+(contagens por gênero, bins via np.histogram, médias por ano) e desenhados com
+primitivas do matplotlib em uma única Figure reaproveitada. dpi e formato
+(png, svg, pdf...) são configuráveis, e as figuras podem ser renderizadas em
+processos paralelos.
+
+O matplotlib (e o seaborn, no backend seaborn) só é importado ao desenhar a
+primeira figura: carregar e filtrar dados não paga o custo desses imports.
+"""
+import functools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from genres import genre_bits, get_genre_index, match_genres
+from instrumentation import measure
+
+FIGURE_SIZE = (12, 6)
+FIGURE_NAMES = ('top_generos', 'distribuicao_avaliacoes', 'evolucao_temporal')
+REPORT_RC = {'figure.figsize': FIGURE_SIZE, 'font.size': 12}
+
+
+@functools.cache
+def _report_style():
+    """Configurações de visualização do relatório, aplicadas na primeira figura."""
+    import matplotlib
+    matplotlib.rcParams.update(REPORT_RC)
+
+
+@functools.cache
+def _seaborn():
+    """pyplot e seaborn, importados e configurados na primeira figura seaborn."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_style("whitegrid")
+    _report_style()
+    return plt, sns
+
+
+def aggregate_for_plots(filtered_df, top=10, bins=20):
+    """Reduz o recorte aos arrays que os três gráficos precisam."""
+    masks, vocab = get_genre_index(filtered_df)
+    genre_counts = genre_bits(masks, len(vocab)).sum(axis=0)
+    order = np.argsort(-genre_counts, kind='stable')[:top]
+    order = order[genre_counts[order] > 0]
+
+    aggregates = {
+        'n': len(filtered_df),
+        'genres': [vocab[i] for i in order],
+        'genre_counts': genre_counts[order],
+        'most_popular': None,
+        'hist_counts': None,
+        'hist_edges': None,
+        'years': None,
+        'year_means': None,
+    }
+
+    if len(order):
+        most_popular = vocab[order[0]]
+        ratings = filtered_df['imdbAverageRating'].to_numpy(dtype=np.float64)
+        ratings = ratings[match_genres(masks, vocab, [most_popular]) & ~np.isnan(ratings)]
+        aggregates['most_popular'] = most_popular
+        aggregates['hist_counts'], aggregates['hist_edges'] = np.histogram(ratings, bins=bins)
+
+    if filtered_df['releaseYear'].nunique() > 1:
+        by_year = filtered_df.groupby('releaseYear')['imdbAverageRating'].mean()
+        aggregates['years'] = by_year.index.to_numpy()
+        aggregates['year_means'] = by_year.to_numpy()
+    return aggregates
+
+
+def _draw_top_genres(ax, agg):
+    positions = np.arange(len(agg['genres']))
+    colors = _viridis(len(positions))
+    ax.barh(positions, agg['genre_counts'], color=colors)
+    ax.set_yticks(positions, agg['genres'])
+    ax.invert_yaxis()
+    ax.set_xlabel('Contagem')
+    ax.set_ylabel('Gênero')
+    ax.set_title(f"Top Gêneros (n={agg['n']:,})")
+
+
+def _draw_rating_histogram(ax, agg):
+    ax.stairs(agg['hist_counts'], agg['hist_edges'], fill=True, color='skyblue', edgecolor='white')
+    ax.set_xlabel('imdbAverageRating')
+    ax.set_ylabel('Count')
+    ax.set_title(f"Distribuição de Avaliações - {agg['most_popular']} (n={agg['n']:,})")
+
+
+def _draw_temporal(ax, agg):
+    ax.plot(agg['years'], agg['year_means'], color='royalblue', linewidth=2)
+    ax.set_xlabel('releaseYear')
+    ax.set_ylabel('imdbAverageRating')
+    ax.set_title(f"Evolução Temporal (n={agg['n']:,})")
+
+
+_DRAWERS = {
+    'top_generos': (_draw_top_genres, 'genres'),
+    'distribuicao_avaliacoes': (_draw_rating_histogram, 'hist_counts'),
+    'evolucao_temporal': (_draw_temporal, 'years'),
+}
+
+
+def _viridis(n):
+    from matplotlib import colormaps
+    return colormaps['viridis'](np.linspace(0, 1, max(n, 1)))[:n]
+
+
+def _new_figure():
+    # Figure direta (sem pyplot): sem estado global, segura em processos paralelos
+    from matplotlib.figure import Figure
+    _report_style()
+    fig = Figure(figsize=FIGURE_SIZE)
+    return fig, fig.add_subplot()
+
+
+def render_figure(name, agg, output_dir, dpi=100, fmt='png', fig=None):
+    """Desenha e salva uma figura; retorna o caminho ou None se não houver dados."""
+    draw, required = _DRAWERS[name]
+    if agg[required] is None or len(agg[required]) == 0:
+        return None
+
+    with measure(f"figure:{name}", agg['n']):
+        if fig is None:
+            fig, ax = _new_figure()
+        else:
+            ax = fig.axes[0]
+            ax.clear()
+        ax.grid(True, color='#dddddd', linewidth=0.8)
+        ax.set_axisbelow(True)
+        draw(ax, agg)
+        fig.tight_layout()
+
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        fig.savefig(path, dpi=dpi, format=fmt)
+    return path
+
+
+def _render_task(args):
+    return render_figure(*args)
+
+
+def render_figures(agg, output_dir, dpi=100, fmt='png', workers=None):
+    """
+    Renderiza as três figuras a partir dos agregados.
+
+    Com workers > 1 cada figura é desenhada em um processo separado; caso
+    contrário uma única Figure é reaproveitada entre os gráficos.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if workers and workers > 1:
+        tasks = [(name, agg, output_dir, dpi, fmt) for name in FIGURE_NAMES]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_render_task, tasks))
+    else:
+        fig, _ = _new_figure()
+        paths = [render_figure(name, agg, output_dir, dpi, fmt, fig=fig) for name in FIGURE_NAMES]
+    return [path for path in paths if path]
+
+
+def render_seaborn_figures(filtered_df, output_dir, dpi=300, fmt='png'):
+    """Backend seaborn: as três figuras desenhadas a partir das linhas do recorte (com KDE)."""
+    plt, sns = _seaborn()
+    try:
+        # Gráfico 1: Top gêneros 
+        with measure('figure:top_generos', len(filtered_df)):
+            plt.figure()
+            genre_counts = (filtered_df['genres'].str.split(',')
+                           .explode()
+                           .str.strip()
+                           .value_counts()
+                           .reset_index())
+            genre_counts.columns = ['Gênero', 'Contagem']
+            genre_counts['Gênero'] = genre_counts['Gênero'].apply(lambda x: re.sub(r'[^\w\s-]', '', x))
+            genre_counts = genre_counts.groupby('Gênero').sum().reset_index().sort_values('Contagem', ascending=False).head(10)
+            
+            sns.barplot(data=genre_counts, x='Contagem', y='Gênero', palette="viridis")
+            plt.title(f"Top Gêneros (n={len(filtered_df):,})")
+            plt.tight_layout()
+            plt.savefig(f"{output_dir}/top_generos.{fmt}", dpi=dpi, format=fmt)
+            plt.close()
+        
+        # Distribuição de avaliações para o gênero mais popular
+        with measure('figure:distribuicao_avaliacoes', len(filtered_df)):
+            plt.figure()
+            most_popular_genre = genre_counts.iloc[0]['Gênero']
+            sns.histplot(
+                filtered_df[filtered_df['genres'].str.contains(re.escape(most_popular_genre))],
+                x='imdbAverageRating',
+                bins=20,
+                kde=True,
+                color='skyblue'
+            )
+            plt.title(f"Distribuição de Avaliações - {most_popular_genre} (n={len(filtered_df):,})")
+            plt.savefig(f"{output_dir}/distribuicao_avaliacoes.{fmt}", dpi=dpi, format=fmt)
+            plt.close()
+        
+        #  Evolução temporal
+        if filtered_df['releaseYear'].nunique() > 1:
+            with measure('figure:evolucao_temporal', len(filtered_df)):
+                plt.figure()
+                sns.lineplot(
+                    data=filtered_df,
+                    x='releaseYear',
+                    y='imdbAverageRating',
+                    estimator='mean',
+                    errorbar=None,
+                    color='royalblue',
+                    linewidth=2
+                )
+                plt.title(f"Evolução Temporal (n={len(filtered_df):,})")
+                plt.savefig(f"{output_dir}/evolucao_temporal.{fmt}", dpi=dpi, format=fmt)
+                plt.close()
+        
+        print(f"\nVisualizações salvas em: {os.path.abspath(output_dir)}")
+    
+    except Exception as e:
+        print(f"\nERRO ao gerar gráficos: {str(e)}")
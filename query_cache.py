@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Cache LRU de consultas do dashboard, indexado por uma chave normalizada de filtros.
+
+Guarda o resultado filtrado e os agregados de cada aba, com limite de entradas
+e de memória estimada. Valores em cache são compartilhados: quem os recebe não
+deve modificá-los.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def make_filter_key(title_type, years, rating_range, genres, genre_mode='any', countries=None,
+                    country_mode='any'):
+    """
+    Normaliza os filtros do app em uma tupla hashable.
+
+    Filtros equivalentes geram a mesma chave (gêneros e países em qualquer
+    ordem, notas com o arredondamento do slider, modo irrelevante sem gêneros
+    ou países selecionados).
+    """
+    genres = tuple(sorted(set(genres or ())))
+    countries = tuple(sorted(set(countries or ())))
+    return (
+        title_type,
+        (int(years[0]), int(years[1])),
+        (round(float(rating_range[0]), 1), round(float(rating_range[1]), 1)),
+        genres,
+        genre_mode if genres else 'any',
+        countries,
+        country_mode if countries else 'any',
+    )
+
+
+def estimate_bytes(value):
+    """
+    Estimativa do tamanho em memória de um valor guardado no cache.
+
+    Conta o conteúdo dos textos (deep=True): em colunas object, os ponteiros
+    são uma fração pequena do que o valor realmente ocupa.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return int(value.nbytes + sum(sys.getsizeof(item) for item in value.flat))
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """Cache LRU com limite de entradas (max_entries) e de memória (max_bytes)."""
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = estimate_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            # Valores maiores que o limite inteiro não são guardados
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Retorna o valor em cache ou calcula, guarda e retorna."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Títulos parecidos: gêneros, ano, nota e popularidade.
+
+A pontuação de um candidato para um título é a soma ponderada de:
+    - Jaccard dos conjuntos de gêneros, por popcount das máscaras de bits
+      (|A ∩ B| / |A ∪ B|);
+    - proximidade do ano, da nota e do log dos votos, cada um normalizado para
+      [0, 1] no catálogo (1 - diferença absoluta).
+
+O Jaccard é calculado de uma vez para todas as consultas do lote contra as
+combinações distintas de gêneros. O catálogo é percorrido em blocos
+candidatos × consultas pequenos o bastante para ficar no cache: cada bloco é
+pontuado por broadcasting (tabela de Jaccard pelo código da combinação e
+distâncias dos atributos entre a coluna dos candidatos e a linha das
+consultas), então cada candidato é lido uma vez para o lote inteiro. Os k
+melhores saem de argpartition no primeiro bloco; nos seguintes só entram os
+candidatos acima do k-ésimo atual, sem ordenar o catálogo.
+
+Uso (a partir da raiz do repositório):
+    python similarity.py "Breaking Bad" -k 10
+"""
+import numpy as np
+import pandas as pd
+
+from genres import factorize_masks, get_genre_index
+
+SIMILARITY_WEIGHTS = {'genres': 0.6, 'releaseYear': 0.15, 'imdbAverageRating': 0.15, 'log_votes': 0.1}
+
+# Tamanho máximo de um bloco de pontuações (candidatos × consultas), em células;
+# pequeno o bastante para o bloco e o buffer de distâncias ficarem no cache
+SIMILARITY_BLOCK_CELLS = 1 << 17
+
+# Consultas pontuadas juntas em cada passada pelo catálogo
+SIMILARITY_QUERY_BLOCK = 128
+
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        values = np.ascontiguousarray(values, dtype=np.uint64)
+        return _BYTE_COUNTS[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def _normalize(values):
+    """Escala para [0, 1] pelo mínimo e máximo; nulos ficam no meio da escala."""
+    values = np.asarray(values, dtype=np.float64)
+    low, high = np.nanmin(values), np.nanmax(values)
+    scaled = (values - low) / (high - low) if high > low else np.zeros_like(values)
+    return np.where(np.isnan(scaled), 0.5, scaled).astype(np.float32)
+
+
+def build_similarity_index(df):
+    """
+    Arrays do catálogo usados na pontuação.
+
+    As máscaras de gêneros (linhas × palavras) são agrupadas pelas combinações
+    distintas (poucas centenas mesmo em catálogos enormes): o Jaccard é
+    calculado entre combinações e cada título só consulta a tabela pelo código
+    da sua.
+    """
+    masks, _ = get_genre_index(df)
+    codes, combos = factorize_masks(masks)
+    return {
+        'masks': masks,
+        'genre_codes': codes,
+        'combos': combos,
+        'combo_counts': _popcount(combos).sum(axis=1, dtype=np.float32),
+        'features': {
+            'releaseYear': _normalize(df['releaseYear']),
+            'imdbAverageRating': _normalize(df['imdbAverageRating']),
+            'log_votes': _normalize(np.log1p(df['imdbNumVotes'].to_numpy(dtype=np.float64))),
+        },
+        'rows': len(df),
+    }
+
+
+def _jaccard_table(index, queries, weights):
+    """Jaccard ponderado (mais os pesos dos atributos) de cada combinação × consulta, float32."""
+    query_combos = index['combos'][index['genre_codes'][queries]]
+    query_counts = index['combo_counts'][index['genre_codes'][queries]]
+    shared = _popcount(index['combos'][:, None, :] & query_combos[None, :, :]).sum(axis=2, dtype=np.float32)
+    union = index['combo_counts'][:, None] + query_counts[None, :] - shared
+    # Dois títulos sem gênero algum não têm nada em comum
+    jaccard = weights['genres'] * np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+    jaccard += sum(weights[name] for name in index['features'])
+    return jaccard
+
+
+def _score_tile(index, jaccard, query_features, rows, weights, scores, distance):
+    """
+    Pontuações candidatos × consultas de um bloco, por broadcasting: Jaccard
+    pelo código da combinação de cada candidato e, por atributo, o desconto
+    peso × |diferença| entre a coluna dos candidatos e a linha das consultas.
+    Escreve em scores (os buffers são reaproveitados entre blocos).
+    """
+    np.take(jaccard, index['genre_codes'][rows], axis=0, out=scores)
+    for name, values in index['features'].items():
+        # O peso entra nos dois lados (|w·a - w·b| = w·|a - b|), uma vez por bloco
+        np.subtract((values[rows] * np.float32(weights[name]))[:, None], query_features[name], out=distance)
+        np.abs(distance, out=distance)
+        scores -= distance
+    return scores
+
+
+def _merge_top(top_scores, top_rows, query_idx, new_scores, new_rows, k):
+    """Junta candidatos novos aos k melhores de cada consulta (arrays consultas × k)."""
+    n_queries = len(top_scores)
+    owner = np.concatenate([np.repeat(np.arange(n_queries), k), query_idx])
+    scores = np.concatenate([top_scores.ravel(), new_scores])
+    rows = np.concatenate([top_rows.ravel(), new_rows])
+    # Ordena por consulta e, dentro dela, da maior para a menor pontuação
+    order = np.lexsort((-scores, owner))
+    pick = order[np.searchsorted(owner[order], np.arange(n_queries))[:, None] + np.arange(k)]
+    return scores[pick], rows[pick]
+
+
+def _top_block(index, queries, candidates, k, weights, exclude_self):
+    """
+    Os k melhores candidatos de um bloco de consultas, percorrendo o catálogo
+    em blocos candidatos × consultas de até SIMILARITY_BLOCK_CELLS células.
+
+    O primeiro bloco define os k melhores de cada consulta por argpartition;
+    nos seguintes, só os candidatos acima do k-ésimo atual de alguma consulta
+    (poucos, já que o limiar sobe rápido) entram na junção. Cada bloco de
+    candidatos é lido uma vez para o lote inteiro de consultas.
+    """
+    jaccard = _jaccard_table(index, queries, weights)
+    query_features = {name: values[queries][None, :] * np.float32(weights[name])
+                      for name, values in index['features'].items()}
+    n_candidates = index['rows'] if candidates is None else len(candidates)
+    tile = max(SIMILARITY_BLOCK_CELLS // len(queries), k)
+    scores = np.empty((min(tile, n_candidates), len(queries)), dtype=np.float32)
+    distance = np.empty_like(scores)
+    columns = np.arange(len(queries))
+
+    top_scores = top_rows = None
+    for start in range(0, n_candidates, tile):
+        block = np.arange(start, min(start + tile, n_candidates))
+        rows = block if candidates is None else candidates[block]
+        # Sem lista de candidatos, o bloco é uma fatia (views, sem cópia das colunas)
+        source = slice(start, start + len(block)) if candidates is None else rows
+        block_scores = _score_tile(index, jaccard, query_features, source, weights,
+                                   scores[:len(block)], distance[:len(block)])
+        if exclude_self:
+            # A própria consulta (quando está entre os candidatos) não é resposta
+            own, query_idx = np.nonzero(rows[:, None] == queries[None, :]) if candidates is not None \
+                else (queries - start, columns)
+            inside = (own >= 0) & (own < len(block))
+            block_scores[own[inside], query_idx[inside]] = -np.inf
+
+        if top_scores is None:
+            # Os k maiores ficam nas últimas k posições da partição
+            best = np.argpartition(block_scores, len(block) - k, axis=0)[len(block) - k:]
+            top_scores = np.take_along_axis(block_scores, best, axis=0).T.copy()
+            top_rows = rows[best].T.copy()
+            continue
+        threshold = top_scores.min(axis=1)
+        hit = np.flatnonzero(block_scores.max(axis=0) > threshold)
+        if len(hit):
+            cand, query_idx = np.nonzero(block_scores[:, hit] > threshold[hit])
+            top_scores, top_rows = _merge_top(top_scores, top_rows, hit[query_idx],
+                                              block_scores[cand, hit[query_idx]], rows[cand], k)
+
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_rows, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def similar_titles(index, queries, k=10, candidates=None, weights=None, exclude_self=True):
+    """
+    Os k títulos mais parecidos com cada consulta.
+
+    queries: posições no catálogo (uma ou várias). candidates: posições entre as
+    quais buscar (padrão: o catálogo inteiro). Retorna (posições, pontuações),
+    arrays consultas × k ordenados da maior para a menor pontuação. Com
+    exclude_self, k só é reduzido quando alguma consulta está entre os
+    candidatos e não sobram k outros títulos.
+    """
+    weights = {**SIMILARITY_WEIGHTS, **(weights or {})}
+    queries = np.atleast_1d(np.asarray(queries, dtype=np.intp))
+    candidates = None if candidates is None else np.asarray(candidates, dtype=np.intp)
+    n_candidates = index['rows'] if candidates is None else len(candidates)
+    # A própria consulta só ocupa uma vaga se for um dos candidatos
+    self_candidate = exclude_self and (candidates is None or bool(np.isin(queries, candidates).any()))
+    k = min(k, max(n_candidates - (1 if self_candidate else 0), 0))
+
+    positions = np.empty((len(queries), k), dtype=np.intp)
+    scores = np.empty((len(queries), k), dtype=np.float32)
+    if k == 0:
+        return positions, scores
+
+    for start in range(0, len(queries), SIMILARITY_QUERY_BLOCK):
+        chunk = queries[start:start + SIMILARITY_QUERY_BLOCK]
+        positions[start:start + len(chunk)], scores[start:start + len(chunk)] = \
+            _top_block(index, chunk, candidates, k, weights, self_candidate)
+    return positions, scores
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dataset_store import load_dataset
+
+    parser = argparse.ArgumentParser(description="Lista os títulos mais parecidos com os títulos informados.")
+    parser.add_argument('titles', nargs='+')
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--data', default='data/processed/data_tratada.csv')
+    args = parser.parse_args()
+
+    catalog, _ = load_dataset(args.data)
+    index = build_similarity_index(catalog)
+    titles = catalog['title'].astype(str)
+    found = [(title, np.flatnonzero((titles == title).to_numpy())) for title in args.titles]
+    queries = [matches[0] for _, matches in found if len(matches)]
+    for title, matches in found:
+        if not len(matches):
+            print(f"\nTítulo não encontrado: {title}")
+
+    neighbors, scores = similar_titles(index, queries, k=args.k)
+    for query, rows, row_scores in zip(queries, neighbors, scores):
+        print(f"\n=== Parecidos com: {catalog['title'].iloc[query]} ({catalog['releaseYear'].iloc[query]}) ===")
+        result = catalog.iloc[rows][['title', 'type', 'genres', 'releaseYear', 'imdbAverageRating']]
+        print(result.assign(score=np.round(row_scores, 3)).to_string(index=False))